@@ -0,0 +1,148 @@
+"""Keyframe animations for the head and antennas.
+
+Animations are declared in ``assets/animations.json``: per animation a
+``lead_in`` (seconds to reach the first keyframe from wherever the robot
+is) and a list of keyframes, each with a time ``t`` and any of
+``antennas`` ([right, left] radians) and ``look`` (an [x, y, z] point for
+the head to look at). Each track is eased between its own keyframes.
+
+Timelines are sampled once, at ``CONTROL_RATE``, into ready-to-send
+targets (head look-at points are solved to poses at that point), so
+playback only has to send frame ``i`` at ``start + i / CONTROL_RATE``.
+"""
+
+import json
+import time
+
+import numpy as np
+
+from .assets import asset_path
+from .stats import LatencyHistogram
+
+# Playback rate; kept under the command queue's 30 Hz limit so frames are not coalesced
+CONTROL_RATE = 25.0
+ANIMATIONS_FILE = "animations.json"
+
+
+def min_jerk(u):
+    """Minimum-jerk easing of 0..1, like goto_target's default interpolation."""
+    return u * u * u * (10.0 - 15.0 * u + 6.0 * u * u)
+
+
+def _sample_track(times, values, samples):
+    """Ease between keyframes; returns (values at samples, mask of samples in range)."""
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    inside = (samples >= times[0] - 1e-9) & (samples <= times[-1] + 1e-9)
+    if len(times) == 1:
+        return np.repeat(values[:1], len(samples), axis=0), inside
+    segment = np.clip(np.searchsorted(times, samples, side="right") - 1, 0, len(times) - 2)
+    t0, t1 = times[segment], times[segment + 1]
+    u = np.clip((samples - t0) / (t1 - t0), 0.0, 1.0)
+    start, end = values[segment], values[segment + 1]
+    return start + min_jerk(u)[:, None] * (end - start), inside
+
+
+class Animation:
+    """A keyframe timeline, pre-interpolated into per-frame targets by :meth:`compile`."""
+
+    def __init__(self, name, keyframes, lead_in=0.0, rate=CONTROL_RATE):
+        self.name = name
+        self.keyframes = sorted(keyframes, key=lambda k: k["t"])
+        self.lead_in = lead_in
+        self.rate = rate
+        self.duration = self.keyframes[-1]["t"] if self.keyframes else 0.0
+        # One (head pose or None, antennas list or None) per control tick
+        self.frames = None
+
+    def compile(self, solve_head=None):
+        """Sample every track at the control rate; head points go through ``solve_head``."""
+        count = int(round(self.duration * self.rate)) + 1
+        samples = np.minimum(np.arange(count) / self.rate, self.duration)
+        heads = [None] * count
+        antennas = [None] * count
+
+        keys = [k for k in self.keyframes if "antennas" in k]
+        if keys:
+            values, inside = _sample_track([k["t"] for k in keys], [k["antennas"] for k in keys], samples)
+            for i in np.flatnonzero(inside):
+                antennas[i] = values[i].tolist()
+
+        keys = [k for k in self.keyframes if "look" in k]
+        if keys and solve_head is not None:
+            values, inside = _sample_track([k["t"] for k in keys], [k["look"] for k in keys], samples)
+            solved = {}
+            pose = None
+            for i in np.flatnonzero(inside):
+                point = tuple(np.round(values[i], 4))
+                if point not in solved:
+                    solved[point] = solve_head(*point)
+                # Keep the previous pose if the robot rejects this point
+                pose = solved[point] if solved[point] is not None else pose
+                heads[i] = pose
+
+        self.frames = list(zip(heads, antennas))
+        return self
+
+    def steps(self, commands, stats):
+        """Play on a MotionExecutor: yields the wait before each frame."""
+        if not self.frames:
+            return
+        period = 1.0 / self.rate
+        head, antennas = self.frames[0]
+        if self.lead_in > 0:
+            commands.goto_target(head=head, antennas=antennas, duration=self.lead_in)
+            yield self.lead_in
+        start = time.monotonic()
+        count = len(self.frames)
+        index = 0
+        while index < count:
+            due = start + index * period
+            now = time.monotonic()
+            if now < due:
+                yield due - now
+                now = time.monotonic()
+            late = max(0.0, now - due)
+            stats.jitter.record(late)
+            if late >= period:
+                # Fell behind: drop the frames that are already past, keep the clock
+                behind = min(int(late / period), count - 1 - index)
+                stats.overruns += 1
+                stats.skipped += behind
+                index += behind
+            head, antennas = self.frames[index]
+            commands.set_target(head=head, antennas=antennas)
+            stats.frames += 1
+            index += 1
+        stats.played += 1
+
+
+class PlaybackStats:
+    """How far behind schedule animation frames were sent."""
+
+    def __init__(self):
+        self.jitter = LatencyHistogram()
+        self.frames = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.played = 0
+
+    def summary(self):
+        return {
+            "played": self.played,
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter": self.jitter.summary(),
+        }
+
+
+def load_animations(path=None, rate=CONTROL_RATE):
+    """Read animation definitions; returns {name: Animation} (not yet compiled)."""
+    path = path or asset_path(ANIMATIONS_FILE)
+    with open(path) as f:
+        definitions = json.load(f)
+    return {
+        name: Animation(name, spec["keyframes"], spec.get("lead_in", 0.0), rate)
+        for name, spec in definitions.items()
+    }
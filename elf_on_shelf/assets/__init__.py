@@ -0,0 +1,53 @@
+"""Bundled assets, resolved once through importlib.resources.
+
+Large assets may ship gzip-compressed (``name.gz``). They are decompressed
+on first use into a per-user cache directory keyed by content hash, so
+later runs reuse the extracted file.
+"""
+
+import functools
+import gzip
+import hashlib
+import os
+import tempfile
+from importlib import resources
+from pathlib import Path
+
+
+def _cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    for directory in (Path(base) / "elf_on_shelf", Path(tempfile.gettempdir()) / "elf_on_shelf"):
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            return directory
+        except OSError:
+            continue
+    raise OSError("No writable cache directory for assets")
+
+
+def _cached_file(name, source, decode=None):
+    """Write an asset to the cache (once per source content) and return its path."""
+    digest = hashlib.sha1(source).hexdigest()[:12]
+    target = _cache_dir() / f"{digest}-{name}"
+    if not target.exists():
+        tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+        tmp.write_bytes(decode(source) if decode else source)
+        os.replace(tmp, target)
+    return target
+
+
+@functools.lru_cache(maxsize=None)
+def asset_path(name):
+    """Return a filesystem path for a bundled asset, or None if it is missing."""
+    root = resources.files(__name__)
+    resource = root / name
+    if resource.is_file():
+        if isinstance(resource, Path):
+            return resource
+        # Package imported from a zip: materialise the file in the cache
+        return _cached_file(name, resource.read_bytes())
+
+    compressed = root / f"{name}.gz"
+    if compressed.is_file():
+        return _cached_file(name, compressed.read_bytes(), decode=gzip.decompress)
+    return None
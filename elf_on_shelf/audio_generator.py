@@ -1,48 +1,64 @@
 """Audio generator that plays sounds on Reachy Mini robot."""
 
-import threading
-import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from .assets import asset_path
+from .audio_scheduler import PRIORITY_JINGLE, PRIORITY_SURPRISE, AudioScheduler, Clip
+from .pcm import load_pcm
+from . import synth
+
+# Jingle variations picked at random per play
+JINGLE_TEMPOS = (140, 160, 180)
+JINGLE_KEYS = (-2, 0, 3, 5)
+
+
+def _output_rate(media):
+    """Return the audio sink's sample rate, or None if it does not report one."""
+    try:
+        rate = media.get_output_audio_samplerate()
+    except Exception:
+        rate = None
+    return int(rate) if rate else None
+
 
 class SoundGenerator:
-    """Sound generator using bundled assets with SDK fallback."""
+    """Sound generator using bundled assets with SDK fallback.
+
+    Assets are decoded once, when the robot is set, into mono PCM buffers
+    at the output's sample rate (the sink copies mono to every channel),
+    and played by pushing them to the media audio sink. Playing by file
+    path remains the fallback. Everything goes through an AudioScheduler,
+    so playing never blocks and a surprise cuts off a jingle.
+
+    With a PCM sink, jingles are synthesized (random tempo, key and
+    instrument) rather than replaying the WAV. The next variation is
+    rendered ahead of time on a synth thread; if it is not ready when a
+    jingle is due, the WAV plays instead.
+    """
     
     def __init__(self, reachy_mini=None):
         self.reachy_mini = reachy_mini
-        self._lock = threading.Lock()
+        self.scheduler = None
         
         # Resolve asset paths using multiple strategies
         self.jingle_path = self._find_asset("jingle.wav")
         self.surprise_path = self._find_asset("surprise.wav")
+        # Decoded sounds by name, as mono float32
+        self.pcm = {}
+        self.output_rate = None
+        self._synth = None
+        # Future of the next jingle variation: (description, samples)
+        self._next_jingle = None
         
     def _find_asset(self, filename):
-        """Find an asset file using multiple strategies."""
-        candidates = [
-            # 1. Relative to this file (best for installed package)
-            Path(__file__).parent / "assets" / filename,
-            # 2. Relative to current working directory
-            Path(os.getcwd()) / "elf_on_shelf" / "assets" / filename,
-            Path(os.getcwd()) / "assets" / filename,
-            # 3. Look in reachable site-packages (hacky but effective)
-            Path(__file__).parent.parent / "elf_on_shelf" / "assets" / filename,
-        ]
-        
-        for cand in candidates:
-            if cand.exists():
-                print(f"[Sound] Found {filename} at: {cand}")
-                return cand
-                
-        # 4. If all else fails, use a recursive search in the parent directory
-        # (This handles weird install structures)
-        try:
-            parent = Path(__file__).parent.parent
-            for path in parent.rglob(filename):
-                print(f"[Sound] Found {filename} via glob at: {path}")
-                return path
-        except Exception:
-            pass
-            
+        """Resolve a bundled asset; returns a bare path if it is missing."""
+        path = asset_path(filename)
+        if path is not None:
+            print(f"[Sound] Found {filename} at: {path}")
+            return path
         print(f"[Sound] ❌ Could not find {filename}!")
         return Path(filename) # Return bare path as last resort
 
@@ -51,47 +67,110 @@ class SoundGenerator:
         self.reachy_mini = reachy_mini
         if hasattr(reachy_mini, 'media_manager'):
             print(f"[Sound] Media backend: {reachy_mini.media_manager.backend}")
+        self._load_pcm()
+        media = getattr(reachy_mini, "media", None)
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+        if media is not None:
+            self.scheduler = AudioScheduler(media, self.output_rate or 16000)
+            self.scheduler.start()
+        self._next_jingle = None
+        if self.output_rate:
+            if self._synth is None:
+                self._synth = ThreadPoolExecutor(max_workers=1, thread_name_prefix="synth")
+            self._prepare_jingle()
 
-    def play_jingle_bells(self):
-        """Play jingle.wav if available, else wake_up.wav."""
-        if self.reachy_mini is None:
+    def _load_pcm(self):
+        media = getattr(self.reachy_mini, "media", None)
+        if media is None or not hasattr(media, "push_audio_sample"):
+            print("[Sound] No audio sink for PCM buffers; playing files by path")
             return
-        if not self._lock.acquire(blocking=False):
-            return
-        
+        rate = _output_rate(media)
+        start = time.perf_counter()
+        for name, path in (("jingle", self.jingle_path), ("surprise", self.surprise_path)):
+            if not path.exists():
+                continue
+            try:
+                samples, self.output_rate = load_pcm(path, rate, channels=1)
+                self.pcm[name] = samples[:, 0]
+            except Exception as e:
+                print(f"[Sound] Could not decode {path.name}: {e}")
+        print(f"[Sound] Decoded {len(self.pcm)} sounds to {self.output_rate} Hz mono PCM "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _play(self, name, path, fallback, priority, on_start=None, samples=None):
+        """Schedule ``samples`` or the decoded buffer, else the file (or the SDK's fallback sound)."""
+        if self.scheduler is None:
+            return False
+        if samples is None:
+            samples = self.pcm.get(name)
+        clip = Clip(name, samples, path if path.exists() else fallback, priority, on_start)
+        return self.scheduler.play(clip)
+
+    def _prepare_jingle(self):
+        """Start rendering a random Jingle Bells variation on the synth thread."""
+        tempo = random.choice(JINGLE_TEMPOS)
+        key = random.choice(JINGLE_KEYS)
+        instrument = random.choice(list(synth.INSTRUMENTS))
+        rate = self.output_rate
+        self._next_jingle = self._synth.submit(
+            lambda: (f"{instrument}, {tempo} BPM, key {key:+d}",
+                     synth.render("jingle_bells", tempo, key, instrument, rate)))
+
+    def _take_jingle(self):
+        """The pre-rendered variation if it is ready (and start the next), else None."""
+        future = self._next_jingle
+        if future is None or not future.done():
+            return None
+        self._prepare_jingle()
         try:
-            if self.jingle_path.exists():
-                print(f"[Sound] 🎶 Playing {self.jingle_path.name}...")
-                self.reachy_mini.media.play_sound(str(self.jingle_path))
-            else:
-                print("[Sound] 🎶 Playing wake_up.wav (fallback)...")
-                self.reachy_mini.media.play_sound("wake_up.wav")
+            return future.result()
         except Exception as e:
-            print(f"[Sound] Error: {e}")
-        finally:
-            self._lock.release()
+            print(f"[Sound] Jingle synthesis error: {e}")
+            return None
 
-    def play_surprise(self):
-        """Play surprise.wav if available, else go_sleep.wav."""
+    def play_jingle_bells(self):
+        """Play a synthesized variation if one is ready, else jingle.wav, else wake_up.wav."""
         if self.reachy_mini is None:
             return
-        if not self._lock.acquire(blocking=False):
+        variation = self._take_jingle()
+        samples = None
+        if variation is not None:
+            description, samples = variation
+            print(f"[Sound] 🎶 Jingle Bells: {description}")
+        elif self.jingle_path.exists():
+            print(f"[Sound] 🎶 Playing {self.jingle_path.name}...")
+        else:
+            print("[Sound] 🎶 Playing wake_up.wav (fallback)...")
+        self._play("jingle", self.jingle_path, "wake_up.wav", PRIORITY_JINGLE, samples=samples)
+
+    def play_surprise(self):
+        """Play surprise.wav if available, else go_sleep.wav; cuts off a jingle."""
+        if self.reachy_mini is None:
             return
-        
-        try:
-            if self.surprise_path.exists():
-                print(f"[Sound] ❗ Playing {self.surprise_path.name}...")
-                self.reachy_mini.media.play_sound(str(self.surprise_path))
-            else:
-                print("[Sound] ❗ Playing go_sleep.wav (fallback)...")
-                self.reachy_mini.media.play_sound("go_sleep.wav")
-        except Exception as e:
-            print(f"[Sound] Error: {e}")
-        finally:
-            self._lock.release()
+        if self.surprise_path.exists():
+            print(f"[Sound] ❗ Playing {self.surprise_path.name}...")
+        else:
+            print("[Sound] ❗ Playing go_sleep.wav (fallback)...")
+        self._play("surprise", self.surprise_path, "go_sleep.wav", PRIORITY_SURPRISE,
+                   on_start=lambda latency: print(
+                       f"[Sound] Surprise first sample after {latency * 1000:.1f} ms"))
+
+    @property
+    def playing(self):
+        return self.scheduler is not None and self.scheduler.playing
+
+    def stats(self):
+        return self.scheduler.stats() if self.scheduler is not None else {}
 
     def stop(self):
-        pass
+        if self.scheduler is not None:
+            self.scheduler.stop()
+        if self._synth is not None:
+            self._synth.shutdown(wait=False, cancel_futures=True)
+            self._synth = None
+            self._next_jingle = None
 
 
 # Global instance
@@ -0,0 +1,214 @@
+"""Single audio output thread that plays sounds by priority, block by block."""
+
+import threading
+import time
+
+from .stats import StageTimer
+
+PRIORITY_JINGLE = 0
+PRIORITY_SURPRISE = 10
+
+# Audio is handed to the sink in blocks of this length
+BLOCK_SECONDS = 0.02
+# Blocks kept queued in the sink ahead of what is audible. One is not
+# enough: any stall of the audio thread over a block (GIL, OpenCV on the
+# vision thread) would be heard as a gap. A sink that cannot be flushed
+# plays all of them before a clip that cuts in.
+LEAD_BLOCKS = 3
+LEAD_SECONDS = LEAD_BLOCKS * BLOCK_SECONDS
+
+
+class Clip:
+    """A sound to play: mono PCM ``samples`` or, without them, a file for ``play_sound``.
+
+    Samples must be ready when the clip is queued; the audio thread only
+    pushes them.
+    """
+
+    def __init__(self, name, samples=None, path=None, priority=PRIORITY_JINGLE, on_start=None):
+        self.name = name
+        self.samples = samples
+        self.path = path
+        self.priority = priority
+        self.on_start = on_start
+        self.requested = time.perf_counter()
+
+
+class AudioScheduler:
+    """Play one clip at a time, letting higher priorities cut in.
+
+    :meth:`play` only hands the clip over, so callers never wait on audio.
+    PCM clips are pushed to the sink in ``BLOCK_SECONDS`` blocks, paced to
+    stay ``LEAD_BLOCKS`` blocks ahead of what is audible. A higher priority
+    clip takes over at the next block boundary and the sink is flushed of
+    the queued audio of the clip it cuts off, so it is heard within one
+    block. Sinks that cannot be flushed (only the SDK's sounddevice and
+    GStreamer backends can) still play that audio first: up to
+    ``LEAD_SECONDS``, 60 ms. A clip whose priority is not above the one
+    playing is dropped. Path-only clips go to ``play_sound`` and cannot be
+    cut off.
+    """
+
+    def __init__(self, media, rate):
+        self.media = media
+        self.rate = rate
+        self.block = max(1, int(rate * BLOCK_SECONDS))
+        self.running = False
+        self.started = 0
+        self.completed = 0
+        self.preempted = 0
+        # Preemptions that dropped the queued audio rather than playing it out
+        self.flushed = 0
+        self.dropped = 0
+        self.errors = 0
+        # From play() to the first sample being heard: the first block
+        # reaching the sink, plus whatever was still queued ahead of it
+        self.first_sample = StageTimer()
+        # How long each clip was actually played for
+        self.played = StageTimer()
+        self._current = None
+        self._pending = None
+        self._busy_until = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    @property
+    def playing(self):
+        """Whether audio handed to the sink is still playing out."""
+        return self._current is not None or time.monotonic() < self._busy_until
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def play(self, clip):
+        """Queue ``clip``; returns False if something more important is playing."""
+        with self._cond:
+            current = self._pending or self._current
+            if current is not None and clip.priority <= current.priority:
+                self.dropped += 1
+                return False
+            self._pending = clip
+            self._cond.notify()
+        return True
+
+    def _run(self):
+        clip = None
+        position = 0
+        started = None
+        while True:
+            cut = None
+            with self._cond:
+                while self.running:
+                    if self._pending is not None:
+                        if clip is not None:
+                            self.preempted += 1
+                            cut = (clip, started)
+                        clip = self._current = self._pending
+                        self._pending = None
+                        position = 0
+                        started = None
+                        break
+                    if clip is None:
+                        self._cond.wait()
+                        continue
+                    # Next block is due once the sink is down to LEAD_SECONDS of audio
+                    remaining = 0.0 if started is None else \
+                        started + position / self.rate - LEAD_SECONDS - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self.running:
+                    return
+            if cut is not None:
+                self._cut(*cut)
+
+            try:
+                if clip.samples is None:
+                    self.media.play_sound(str(clip.path))
+                    self._started(clip)
+                    self.completed += 1
+                    clip = self._current = None
+                    continue
+                block = clip.samples[position:position + self.block]
+                self.media.push_audio_sample(block)
+            except Exception as e:
+                self.errors += 1
+                if clip.samples is not None and started is None and clip.path is not None:
+                    print(f"[Sound] PCM playback error, playing {clip.name} by path: {e}")
+                    clip.samples = None
+                    continue
+                print(f"[Sound] {clip.name} playback error: {e}")
+                clip = self._current = None
+                continue
+            if started is None:
+                # Audible once the audio still queued from the last clip has played
+                now = time.monotonic()
+                started = max(now, self._busy_until)
+                self._started(clip, started - now)
+            position += len(block)
+            self._busy_until = started + position / self.rate
+            if position >= len(clip.samples):
+                self.completed += 1
+                self._finish(clip, started)
+                clip = self._current = None
+
+    def _started(self, clip, queued=0.0):
+        self.started += 1
+        latency = time.perf_counter() - clip.requested + queued
+        self.first_sample.record(clip.name, latency)
+        if clip.on_start is not None:
+            clip.on_start(latency)
+
+    def _cut(self, clip, started):
+        """Stop ``clip`` for a higher priority one, dropping its queued audio if possible."""
+        if started is not None and self._flush():
+            self.flushed += 1
+            self._busy_until = min(self._busy_until, time.monotonic())
+        self._finish(clip, started, cut=True)
+
+    def _flush(self):
+        """Drop the audio queued in the sink; returns False if the backend cannot."""
+        audio = getattr(self.media, "audio", None)
+        flush = getattr(audio, "clear_output_buffer", None) or getattr(audio, "clear_player", None)
+        if flush is None:
+            return False
+        try:
+            flush()
+        except Exception as e:
+            self.errors += 1
+            print(f"[Sound] Could not flush the audio sink: {e}")
+            return False
+        return True
+
+    def _finish(self, clip, started, cut=False):
+        if started is None:
+            return
+        # Audible until what was pushed has played out; if cut off, that is
+        # at most the lead already in the sink (none once flushed)
+        end = self._busy_until
+        if cut:
+            end = min(time.monotonic() + LEAD_SECONDS, end)
+        self.played.record(clip.name, max(0.0, end - started))
+
+    def stats(self):
+        return {
+            "started": self.started,
+            "completed": self.completed,
+            "preempted": self.preempted,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "first_sample": self.first_sample.summary(),
+            "played": self.played.summary(),
+        }
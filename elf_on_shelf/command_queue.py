@@ -0,0 +1,271 @@
+"""Outbound robot command layer: merges, de-duplicates and rate-limits targets."""
+
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .animation import min_jerk
+
+# One pending target for a part ("head" or "antennas"). kind is "set"
+# (set_target), "goto" (interpolate over duration) or "look" (look at an
+# (x, y, z) point over duration, head only).
+Command = namedtuple("Command", ["kind", "value", "duration"])
+
+# A goto in progress: from start to end, over duration from t0
+Move = namedtuple("Move", ["start", "end", "t0", "duration"])
+
+
+def _rotation_log(rotation):
+    """Axis-angle vector of a 3x3 rotation matrix."""
+    cos_angle = np.clip((np.trace(rotation) - 1.0) / 2.0, -1.0, 1.0)
+    angle = np.arccos(cos_angle)
+    if angle < 1e-9:
+        return np.zeros(3)
+    skew = np.array([rotation[2, 1] - rotation[1, 2],
+                     rotation[0, 2] - rotation[2, 0],
+                     rotation[1, 0] - rotation[0, 1]])
+    if np.pi - angle < 1e-6:
+        # Half-turn: the skew part vanishes, take the axis from the diagonal
+        axis = np.sqrt(np.maximum((np.diag(rotation) + 1.0) / 2.0, 0.0))
+        axis[1] = np.copysign(axis[1], rotation[0, 1] + rotation[1, 0])
+        axis[2] = np.copysign(axis[2], rotation[0, 2] + rotation[2, 0])
+        return axis / np.linalg.norm(axis) * angle
+    return skew * (angle / (2.0 * np.sin(angle)))
+
+
+def _rotation_exp(vector):
+    """3x3 rotation matrix of an axis-angle vector (Rodrigues)."""
+    angle = np.linalg.norm(vector)
+    if angle < 1e-9:
+        return np.eye(3)
+    x, y, z = vector / angle
+    k = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    return np.eye(3) + np.sin(angle) * k + (1.0 - np.cos(angle)) * (k @ k)
+
+
+def interpolate(start, end, u, part):
+    """Value a fraction ``u`` of the way from start to end.
+
+    Head poses (4x4) move their translation in a straight line and rotate
+    about a fixed axis; antennas are interpolated joint by joint.
+    """
+    if part == "antennas":
+        return start + u * (end - start)
+    pose = np.eye(4)
+    rotation = start[:3, :3]
+    pose[:3, :3] = rotation @ _rotation_exp(u * _rotation_log(rotation.T @ end[:3, :3]))
+    pose[:3, 3] = start[:3, 3] + u * (end[:3, 3] - start[:3, 3])
+    return pose
+
+
+class CommandQueue:
+    """Send head and antenna targets to the robot from a single thread.
+
+    Only the SDK's non-blocking ``set_target`` is used. A goto (or
+    look-at, solved to a head pose first) is interpolated here with
+    minimum-jerk easing and streamed one step per tick, so nothing ever
+    waits behind a move in progress: a new target for a part replaces its
+    move on the next tick.
+
+    Each part has one pending slot, so a target that is replaced before it
+    goes out is dropped (coalesced). Head and antenna targets due on the
+    same tick go out as one message, a target identical to the last one
+    sent for its part is skipped, and ticks are spaced at least
+    ``1 / max_rate`` seconds apart. ``urgent`` targets (holding still) skip
+    the spacing wait. Callers never block on the transport; ``on_sent``
+    is called with the monotonic send time once a target has gone out, and
+    not at all if sending it failed. A failed target is not remembered as
+    sent, so issuing it again sends it again.
+    """
+
+    def __init__(self, reachy, max_rate=30.0, state=None):
+        self.reachy = reachy
+        # RobotStateCache, for where a goto starts when nothing was sent yet
+        self.state = state
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.running = False
+        self.submitted = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.merged = 0
+        self.duplicates = 0
+        self.errors = 0
+        self._pending = {}
+        self._moves = {}
+        # Last value the robot accepted per part
+        self._last_value = {}
+        self._urgent = False
+        self._on_sent = []
+        # Until when the robot's own head commands keep it moving (monotonic)
+        self.head_moving_until = float("-inf")
+        self._last_tick = float("-inf")
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._send_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    @property
+    def moving(self):
+        """Whether a goto is still being streamed."""
+        return bool(self._moves)
+
+    def set_target(self, head=None, antennas=None, urgent=False, on_sent=None):
+        """Move to a target immediately (no interpolation)."""
+        self._put(head, antennas, "set", None, urgent, on_sent)
+
+    def goto_target(self, head=None, antennas=None, duration=0.5):
+        """Interpolate to a target over ``duration`` seconds."""
+        self._put(head, antennas, "goto", duration, False)
+
+    def look_at_world(self, x, y, z, duration=1.0):
+        """Turn the head to look at a point, over ``duration`` seconds."""
+        self._put((x, y, z), None, "look", duration, False)
+
+    def _put(self, head, antennas, kind, duration, urgent, on_sent=None):
+        with self._cond:
+            for part, value in (("head", head), ("antennas", antennas)):
+                if value is None:
+                    continue
+                self.submitted += 1
+                if part in self._pending:
+                    self.coalesced += 1
+                self._pending[part] = Command(kind, value, duration)
+            self._urgent = self._urgent or urgent
+            if on_sent is not None:
+                self._on_sent.append(on_sent)
+            self._cond.notify()
+
+    def _send_loop(self):
+        while True:
+            with self._cond:
+                # _moves is only changed on this thread, so reading it here is safe
+                self._cond.wait_for(lambda: self._pending or self._moves or not self.running)
+                if not self.running:
+                    return
+                # Space ticks out; targets arriving meanwhile coalesce
+                while not self._urgent and self.running:
+                    remaining = self._last_tick + self.min_interval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self.running:
+                    return
+                batch = self._pending
+                self._pending = {}
+                urgent = self._urgent
+                self._urgent = False
+                callbacks = self._on_sent
+                self._on_sent = []
+            now = time.monotonic()
+            self._last_tick = now
+            targets = self._start_commands(batch, urgent, now)
+            self._step_moves(targets, now)
+            if not self._send(targets):
+                continue
+            # Skipped duplicates count as sent: the robot already has that target
+            sent_at = time.monotonic()
+            for callback in callbacks:
+                try:
+                    callback(sent_at)
+                except Exception as e:
+                    print(f"[Motion] Command callback error: {e}")
+
+    def _start_commands(self, batch, urgent, now):
+        """Turn new commands into immediate targets or moves; returns the targets."""
+        targets = {}
+        for part, command in batch.items():
+            self._moves.pop(part, None)
+            if command.kind == "set":
+                targets[part] = command.value
+                if part == "head" and not urgent:
+                    # Urgent targets are holds, which stop the head rather than move it
+                    self.head_moving_until = max(self.head_moving_until, now)
+                continue
+            end = command.value
+            if command.kind == "look":
+                end = self._solve_look(*end)
+                if end is None:
+                    continue
+            start = self._start_value(part)
+            if start is None or not command.duration:
+                targets[part] = end
+            else:
+                self._moves[part] = Move(start, np.asarray(end, dtype=np.float64), now,
+                                         command.duration)
+            if part == "head":
+                self.head_moving_until = max(self.head_moving_until,
+                                             now + (command.duration or 0.0))
+        return targets
+
+    def _step_moves(self, targets, now):
+        for part, move in list(self._moves.items()):
+            u = min(1.0, (now - move.t0) / move.duration)
+            targets[part] = interpolate(move.start, move.end, min_jerk(u), part)
+            if u >= 1.0:
+                del self._moves[part]
+
+    def _start_value(self, part):
+        """Where a move of ``part`` starts: the last target sent, else the measured pose."""
+        value = self._last_value.get(part)
+        if value is None and self.state is not None:
+            state = self.state.latest() or self.state.refresh()
+            if state is not None:
+                value = state.head if part == "head" else state.antennas
+        return None if value is None else np.asarray(value, dtype=np.float64)
+
+    def _solve_look(self, x, y, z):
+        try:
+            pose = self.reachy.look_at_world(x=x, y=y, z=z, perform_movement=False)
+        except Exception as e:
+            pose = None
+            print(f"[Motion] look-at solve error: {e}")
+        if pose is None:
+            self.errors += 1
+        return pose
+
+    def _send(self, targets):
+        """Send the targets that changed; returns whether the robot has them all."""
+        send = {}
+        for part, value in targets.items():
+            last = self._last_value.get(part)
+            if last is not None and np.array_equal(last, value):
+                self.duplicates += 1
+                continue
+            send[part] = value
+        if not send:
+            return True
+        try:
+            self.reachy.set_target(**send)
+        except Exception as e:
+            self.errors += 1
+            print(f"[Motion] set_target command error: {e}")
+            return False
+        self.sent += 1
+        if len(send) == 2:
+            self.merged += 1
+        self._last_value.update(send)
+        return True
+
+    def counters(self):
+        return {
+            "submitted": self.submitted,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "merged": self.merged,
+            "duplicates": self.duplicates,
+            "errors": self.errors,
+        }
@@ -0,0 +1,252 @@
+"""Face detection in a pool of worker processes, fed through shared memory."""
+
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Most frames a worker takes off the queue at once and detects as one batch
+MAX_BATCH = 4
+
+
+def _attach(attached, shm_name):
+    shm = attached.get(shm_name)
+    if shm is None:
+        # The frame size changed and the parent made a new block;
+        # it may already be gone again if the size changed twice
+        for old in attached.values():
+            old.close()
+        attached.clear()
+        shm = attached[shm_name] = shared_memory.SharedMemory(name=shm_name)
+    return shm
+
+
+def _worker(tasks, results, detector, detection_width):
+    """Worker process: detect faces in frames found in shared memory.
+
+    Frames that queued up while the worker was busy are detected together
+    with ``detect_batch``. Every task gets a result; a failure is sent back
+    as its error message with no faces, so the parent keeps its ordering
+    and slot bookkeeping. Results carry the per-frame detection time.
+    """
+    import cv2
+    from .detectors import create_detector
+
+    # Parallelism comes from the pool; keep OpenCV from oversubscribing cores
+    cv2.setNumThreads(1)
+    face_detector = create_detector(detector, detection_width=detection_width)
+    attached = {}
+    running = True
+    while running:
+        task = tasks.get()
+        if task is None:
+            break
+        batch = [task]
+        while len(batch) < MAX_BATCH:
+            try:
+                task = tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                running = False
+                break
+            batch.append(task)
+
+        errors = [None] * len(batch)
+        faces = [[] for _ in batch]
+        grays = {}
+        for index, (seq, timestamp, shm_name, slot, shape) in enumerate(batch):
+            try:
+                shm = _attach(attached, shm_name)
+                slot_bytes = shape[0] * shape[1]
+                grays[index] = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf,
+                                          offset=slot * slot_bytes)
+            except Exception as e:
+                errors[index] = f"{type(e).__name__}: {e}"
+        latency = 0.0
+        if grays:
+            try:
+                detected = face_detector.detect_batch(list(grays.values()))
+                latency = face_detector.last_latency
+                for index, (boxes, _) in zip(grays, detected):
+                    faces[index] = [tuple(int(v) for v in box) for box in boxes]
+            except Exception as e:
+                for index in grays:
+                    errors[index] = f"{type(e).__name__}: {e}"
+        grays.clear()
+        for (seq, timestamp, shm_name, slot, _), found, error in zip(batch, faces, errors):
+            results.put((seq, timestamp, shm_name, slot, found, error,
+                         latency if error is None else None))
+    for shm in attached.values():
+        shm.close()
+
+
+class ProcessPoolDetector:
+    """Run face detection on several frames at once in worker processes.
+
+    Grayscale frames are copied once into a slot of a shared memory block
+    and only ``(seq, slot, shape)`` travels through the task queue, so the
+    image is never pickled. Results are put back in submission order by a
+    collector thread and handed to ``on_result(faces, timestamp)``.
+
+    If a worker dies the pool marks itself ``failed``; the caller is
+    expected to close it and fall back to detecting in-thread.
+    """
+
+    def __init__(self, on_result, workers=2, detector="haar", detection_width=None,
+                 slots_per_worker=2):
+        self.on_result = on_result
+        self.workers = workers
+        self.detector = detector
+        self.detection_width = detection_width
+        self.slots = workers * slots_per_worker
+        self.failed = False
+        self.submitted = 0
+        self.completed = 0
+        # Frames dropped because every slot was still being processed
+        self.dropped = 0
+        # Frames a worker could not process (reported back, not fatal)
+        self.errors = 0
+        # Detection time reported by the workers, for latency_report()
+        self.detect_frames = 0
+        self.detect_time = 0.0
+        self.last_latency = 0.0
+        self._ctx = mp.get_context("spawn")
+        self._tasks = self._ctx.Queue()
+        self._results = self._ctx.Queue()
+        self._processes = []
+        self._shm = None
+        self._shape = None
+        self._free_slots = []
+        self._slots_lock = threading.Lock()
+        self._pending = {}
+        self._next_seq = 1
+        self._running = False
+        self._collector = None
+
+    def start(self):
+        """Spawn the worker processes and the result collector."""
+        if self._running:
+            return
+        self._running = True
+        for _ in range(self.workers):
+            process = self._ctx.Process(
+                target=_worker,
+                args=(self._tasks, self._results, self.detector, self.detection_width),
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect_loop, daemon=True)
+        self._collector.start()
+
+    def _ensure_buffer(self, shape):
+        """(Re)allocate the shared block when the frame size changes."""
+        if shape == self._shape:
+            return
+        with self._slots_lock:
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+            slot_bytes = shape[0] * shape[1]
+            self._shm = shared_memory.SharedMemory(create=True, size=slot_bytes * self.slots)
+            self._shape = shape
+            self._free_slots = list(range(self.slots))
+
+    def submit(self, gray, timestamp):
+        """Queue a grayscale frame for detection. Returns False if it was dropped."""
+        if self.failed or not self._running:
+            return False
+        shape = gray.shape[:2]
+        self._ensure_buffer(shape)
+        with self._slots_lock:
+            if not self._free_slots:
+                self.dropped += 1
+                return False
+            slot = self._free_slots.pop()
+            slot_bytes = shape[0] * shape[1]
+            view = np.ndarray(shape, dtype=np.uint8, buffer=self._shm.buf,
+                              offset=slot * slot_bytes)
+            view[...] = gray
+            del view
+            self.submitted += 1
+            task = (self.submitted, timestamp, self._shm.name, slot, shape)
+        self._tasks.put(task)
+        return True
+
+    def _collect_loop(self):
+        while self._running:
+            # A dead worker never returns its frame, which would stall ordering
+            if not all(p.is_alive() for p in self._processes):
+                print("[DetectPool] A worker died - pool disabled")
+                self.failed = True
+                return
+            try:
+                seq, timestamp, shm_name, slot, faces, error, latency = \
+                    self._results.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                self.failed = True
+                return
+            if latency is not None:
+                self.detect_frames += 1
+                self.detect_time += latency
+                self.last_latency = latency
+            if error is not None:
+                self.errors += 1
+                if self.errors == 1 or self.errors % 100 == 0:
+                    print(f"[DetectPool] Worker error ({self.errors}): {error}")
+
+            with self._slots_lock:
+                # Slots of a block replaced after a frame size change are gone
+                if self._shm is not None and shm_name == self._shm.name:
+                    self._free_slots.append(slot)
+            self._pending[seq] = (timestamp, faces)
+            # Deliver in order
+            while self._next_seq in self._pending:
+                timestamp, faces = self._pending.pop(self._next_seq)
+                self._next_seq += 1
+                self.completed += 1
+                try:
+                    self.on_result(faces, timestamp)
+                except Exception as e:
+                    print(f"[DetectPool] Result handler error: {e}")
+
+    def close(self):
+        """Stop the workers and release the shared memory."""
+        self._running = False
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=1.0)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        if self._collector is not None:
+            self._collector.join(timeout=1.0)
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+            self._shape = None
+
+    def latency_report(self):
+        """Per-frame detection latency measured in the workers, in milliseconds."""
+        mean = self.detect_time / self.detect_frames if self.detect_frames else 0.0
+        return {
+            "backend": f"{self.detector} x{self.workers} processes",
+            "frames": self.detect_frames,
+            "mean_ms": mean * 1000,
+            "last_ms": self.last_latency * 1000,
+        }
+
+    def counters(self):
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
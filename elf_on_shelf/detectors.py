@@ -0,0 +1,366 @@
+"""Face detector backends.
+
+Every backend takes a grayscale frame and returns ``(boxes, scores)``:
+an ``(N, 4)`` int array of full-frame ``(x, y, w, h)`` boxes and an ``(N,)``
+float array of scores. Backends time themselves so the cheapest one can be
+picked per host.
+
+* ``haar``: OpenCV's frontal-face Haar cascade.
+* ``dnn``: MediaPipe's BlazeFace short-range CNN (bundled, Apache-2.0, see
+  ``assets/face_detection_short_range.LICENSE``) run through ``cv2.dnn``.
+"""
+
+import inspect
+import time
+
+import cv2
+import numpy as np
+
+from .assets import asset_path
+
+# Haar settings, expressed in full-frame pixels
+SCALE_FACTOR = 1.1
+MIN_NEIGHBORS = 8  # Increased from 5 to reduce false positives
+MIN_FACE_SIZE = (60, 60)  # Increased from 30x30 to avoid noise
+# Native window of the Haar cascade; faces smaller than this are never found
+CASCADE_WINDOW = 24
+# Default width frames are downscaled to before the cascade runs
+DEFAULT_DETECTION_WIDTH = 320
+
+HAAR_CASCADE_FILE = "haarcascade_frontalface_default.xml"
+
+# BlazeFace short-range: 128x128 input, 896 anchors at strides 8 and 16
+DNN_MODEL_FILE = "face_detection_short_range.tflite"
+DNN_INPUT_SIZE = 128
+DNN_ANCHOR_LAYERS = ((8, 2), (16, 6))  # (stride, anchors per cell)
+# Side of the square tiles a frame is cut into for the DNN, in frame pixels.
+# 360 px tiles make a 1280x720 frame 8 tiles, and a 60-px face 21 px at the
+# model's input.
+DNN_TILE_SIZE = 360
+DNN_SCORE_THRESHOLD = 0.75
+DNN_NMS_THRESHOLD = 0.3
+
+
+# Shared "no faces" result, so empty frames allocate nothing
+_NO_BOXES = np.empty((0, 4), dtype=np.int32)
+_NO_SCORES = np.empty((0,), dtype=np.float32)
+_NO_BOXES.flags.writeable = False
+_NO_SCORES.flags.writeable = False
+
+
+def _empty_result():
+    return _NO_BOXES, _NO_SCORES
+
+
+class FaceDetector:
+    """Base class: subclasses implement ``_detect(gray) -> (boxes, scores)``."""
+
+    name = "base"
+
+    def __init__(self):
+        self.frames = 0
+        self.total_time = 0.0
+        self.last_latency = 0.0
+        self.load_time = 0.0
+
+    def load(self):
+        """Load model files; called before the first frame if not done already."""
+
+    def _detect(self, gray):
+        raise NotImplementedError
+
+    def detect(self, gray):
+        """Detect faces in one grayscale frame and record the latency."""
+        start = time.perf_counter()
+        result = self._detect(gray)
+        self._record(time.perf_counter() - start, 1)
+        return result
+
+    def detect_batch(self, grays):
+        """Detect faces in several frames; backends may run them together."""
+        return [self.detect(gray) for gray in grays]
+
+    def _record(self, elapsed, frames):
+        self.frames += frames
+        self.total_time += elapsed
+        self.last_latency = elapsed / frames
+
+    def latency_report(self):
+        """Return measured per-frame latency in milliseconds."""
+        mean = self.total_time / self.frames if self.frames else 0.0
+        return {
+            "backend": self.name,
+            "frames": self.frames,
+            "mean_ms": mean * 1000,
+            "last_ms": self.last_latency * 1000,
+        }
+
+
+class HaarDetector(FaceDetector):
+    """OpenCV Haar cascade run on a downscaled copy of the frame.
+
+    The frame is downscaled with area interpolation to ``detection_width``
+    before the cascade runs (``None`` keeps the full resolution). The scale
+    never drops so low that a ``min_face_size`` face would shrink below the
+    cascade window, so the downscale does not cost recall on faces we keep.
+    That puts a floor of ``frame width * CASCADE_WINDOW / min face size``
+    on the width actually used (512 px for 1280-px frames and 60-px faces);
+    :meth:`effective_width` gives it, and a raised width is logged once.
+    Scores are the number of neighbouring hits merged into each box.
+    """
+
+    name = "haar"
+
+    def __init__(self, detection_width=DEFAULT_DETECTION_WIDTH, cascade_path=None,
+                 scale_factor=SCALE_FACTOR, min_neighbors=MIN_NEIGHBORS,
+                 min_face_size=MIN_FACE_SIZE):
+        super().__init__()
+        self.detection_width = detection_width
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_face_size = tuple(min_face_size)
+        self.cascade_path = cascade_path
+        # Parsing the cascade XML is slow, so it happens on first use
+        self.cascade = None
+        # Downscaled frame and box-mapping scratch, reused between frames
+        self._small = None
+        self._scratch = np.empty((8, 4), dtype=np.float64)
+        # Frame widths a raised detection width was already logged for
+        self._clamp_logged = set()
+
+    def load(self):
+        """Parse the cascade now rather than on the first frame."""
+        if self.cascade is not None:
+            return
+        start = time.perf_counter()
+        cascade_path = self.cascade_path or asset_path(HAAR_CASCADE_FILE)
+        if cascade_path is None:
+            cascade_path = cv2.data.haarcascades + HAAR_CASCADE_FILE
+        print(f"[Vision] Loading cascade from: {cascade_path}")
+        cascade = cv2.CascadeClassifier(str(cascade_path))
+        if cascade.empty():
+            raise ValueError('Failed to load Haar cascade')
+        self.cascade = cascade
+        self.load_time = time.perf_counter() - start
+
+    def _scale(self, width):
+        """Downscale factor for a frame ``width`` px wide (1.0 = full size)."""
+        if not self.detection_width or width <= self.detection_width:
+            return 1.0
+        return min(1.0, max(self.detection_width / width, CASCADE_WINDOW / min(self.min_face_size)))
+
+    def effective_width(self, width):
+        """Width the cascade actually runs at for frames ``width`` px wide."""
+        scale = self._scale(width)
+        return width if scale >= 1.0 else max(1, round(width * scale))
+
+    def _detect(self, gray):
+        if self.cascade is None:
+            self.load()
+        height, width = gray.shape[:2]
+        scale = self._scale(width)
+        if (self.detection_width and width > self.detection_width
+                and width not in self._clamp_logged):
+            self._clamp_logged.add(width)
+            effective = self.effective_width(width)
+            if effective > self.detection_width:
+                print(f"[Vision] detection_width {self.detection_width} raised to {effective} "
+                      f"for {width}-px frames, so {min(self.min_face_size)}-px faces stay "
+                      f"above the {CASCADE_WINDOW}-px cascade window")
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            if self._small is None or self._small.shape != (size[1], size[0]):
+                self._small = np.empty((size[1], size[0]), dtype=np.uint8)
+            gray = cv2.resize(gray, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        min_size = tuple(max(1, round(s * scale)) for s in self.min_face_size)
+        faces, neighbours = self.cascade.detectMultiScale2(
+            gray,
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=min_size,
+        )
+        if not len(faces):
+            return _empty_result()
+        faces = faces.astype(np.int32, copy=False)
+        if scale < 1.0:
+            # Map boxes back to full-frame coordinates, in place
+            if len(faces) > len(self._scratch):
+                self._scratch = np.empty((len(faces), 4), dtype=np.float64)
+            scratch = self._scratch[:len(faces)]
+            np.divide(faces, scale, out=scratch)
+            np.rint(scratch, out=scratch)
+            faces[:] = scratch
+        return faces, np.asarray(neighbours, dtype=np.float32)
+
+
+def _blazeface_anchors():
+    """Anchor centres (x, y), normalised to the input, in the model's output order."""
+    centres = []
+    for stride, per_cell in DNN_ANCHOR_LAYERS:
+        cells = DNN_INPUT_SIZE // stride
+        y, x = np.mgrid[0:cells, 0:cells]
+        grid = np.stack(((x + 0.5) / cells, (y + 0.5) / cells), axis=-1).reshape(-1, 2)
+        centres.append(np.repeat(grid, per_cell, axis=0))
+    return np.concatenate(centres)
+
+
+class DnnDetector(FaceDetector):
+    """BlazeFace short-range CNN run on the CPU through ``cv2.dnn``.
+
+    The model sees 128x128 squares, too coarse for faces across a whole
+    wide frame, so each frame is cut into overlapping ``tile_size`` squares
+    that run as one batch; boxes from all tiles are merged with NMS. The
+    input blob is allocated once for ``max_batch`` tiles and filled in
+    place. :meth:`detect_batch` packs the tiles of several frames into the
+    same forward passes. Scores are face probabilities.
+
+    Batching is checked when the model loads: OpenCV's TFLite importer
+    (4.14) mixes up the samples of a batch for this model, and then every
+    tile runs on its own.
+    """
+
+    name = "dnn"
+
+    def __init__(self, model_path=None, tile_size=DNN_TILE_SIZE,
+                 score_threshold=DNN_SCORE_THRESHOLD, nms_threshold=DNN_NMS_THRESHOLD,
+                 max_batch=16):
+        super().__init__()
+        start = time.perf_counter()
+        model_path = model_path or asset_path(DNN_MODEL_FILE)
+        if model_path is None:
+            raise FileNotFoundError(f"DNN face model {DNN_MODEL_FILE} not found")
+        self.net = cv2.dnn.readNetFromTFLite(str(model_path))
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        self._outputs = ["classificators", "regressors"]
+        self.tile_size = tile_size
+        self.score_threshold = score_threshold
+        # Compare raw logits, so only kept anchors go through the sigmoid
+        self._logit_threshold = float(np.log(score_threshold / (1.0 - score_threshold)))
+        self.nms_threshold = nms_threshold
+        self.max_batch = max_batch
+        size = DNN_INPUT_SIZE
+        self._blob = np.empty((max_batch, 3, size, size), dtype=np.float32)
+        self._resized = np.empty((size, size), dtype=np.uint8)
+        self._anchors = _blazeface_anchors()
+        # Tile layout per frame shape: (T, 4) int array of x, y, side, side
+        self._tiles = {}
+        self.batch = max_batch if max_batch > 1 and self._batch_is_exact() else 1
+        if self.batch < max_batch:
+            print("[Vision] cv2.dnn does not batch the face model correctly - running tiles one by one")
+        self.load_time = time.perf_counter() - start
+
+    def _forward(self, count):
+        """Run the first ``count`` blob entries; returns (T, 896) logits, (T, 896, 16) regressors."""
+        self.net.setInput(self._blob[:count])
+        scores, boxes = self.net.forward(self._outputs)
+        # The network stacks the batch along its anchor axis
+        return scores.reshape(count, -1), boxes.reshape(count, -1, 16)
+
+    def _batch_is_exact(self):
+        """Whether a batch of two gives the same outputs as two single runs."""
+        probe = self._blob[:2]
+        probe[0] = np.linspace(-1.0, 1.0, probe[0].size).reshape(probe[0].shape)
+        probe[1] = probe[0, :, ::-1]
+        logits, _ = self._forward(2)
+        batched = logits.copy()
+        probe[0] = probe[1]
+        single, _ = self._forward(1)
+        return np.allclose(batched[1], single[0], atol=1e-3)
+
+    def tiles(self, shape):
+        """Overlapping square tiles covering a frame of ``shape``, as (x, y, w, h) rows."""
+        tiles = self._tiles.get(shape)
+        if tiles is None:
+            height, width = shape[:2]
+            side = min(self.tile_size, height, width)
+            xs = np.linspace(0, width - side, -(-width // side)).round()
+            ys = np.linspace(0, height - side, -(-height // side)).round()
+            tiles = np.array([(x, y, side, side) for y in ys for x in xs], dtype=np.int64)
+            self._tiles[shape] = tiles
+        return tiles
+
+    def _fill(self, index, gray, tile):
+        x, y, w, h = tile
+        cv2.resize(gray[y:y + h, x:x + w], self._resized.shape[::-1], dst=self._resized,
+                   interpolation=cv2.INTER_AREA)
+        plane = self._blob[index, 0]
+        # Normalise to [-1, 1] and replicate gray into all 3 channels
+        np.multiply(self._resized, 1.0 / 127.5, out=plane, casting="unsafe")
+        plane -= 1.0
+        self._blob[index, 1] = plane
+        self._blob[index, 2] = plane
+
+    def _decode(self, logits, regressors, tiles):
+        """Boxes for one frame from its tiles' (T, 896) logits and (T, 896, 16) regressors."""
+        tile_index, anchor = np.nonzero(logits > self._logit_threshold)
+        if not len(anchor):
+            return _empty_result()
+        scores = 1.0 / (1.0 + np.exp(-logits[tile_index, anchor]))
+        raw = regressors[tile_index, anchor, :4] / DNN_INPUT_SIZE
+        centres = self._anchors[anchor] + raw[:, :2]
+        tile = tiles[tile_index]
+        sides = tile[:, 2:4]
+        rects = np.empty((len(anchor), 4))
+        rects[:, 2:] = raw[:, 2:] * sides
+        rects[:, :2] = tile[:, :2] + centres * sides - rects[:, 2:] / 2
+        picked = cv2.dnn.NMSBoxes(rects.tolist(), scores.tolist(),
+                                  self.score_threshold, self.nms_threshold)
+        picked = np.asarray(picked, dtype=np.int64).reshape(-1)
+        return rects[picked].round().astype(np.int32), scores[picked].astype(np.float32)
+
+    def _run(self, grays):
+        """Run the tiles of every frame through the network, ``batch`` at a time."""
+        layouts = [self.tiles(gray.shape) for gray in grays]
+        jobs = [(gray, tile) for gray, tiles in zip(grays, layouts) for tile in tiles]
+        logits = np.empty((len(jobs), len(self._anchors)), dtype=np.float32)
+        regressors = np.empty((len(jobs), len(self._anchors), 16), dtype=np.float32)
+        for offset in range(0, len(jobs), self.batch):
+            chunk = jobs[offset:offset + self.batch]
+            for index, (gray, tile) in enumerate(chunk):
+                self._fill(index, gray, tile)
+            end = offset + len(chunk)
+            logits[offset:end], regressors[offset:end] = self._forward(len(chunk))
+        results = []
+        first = 0
+        for tiles in layouts:
+            last = first + len(tiles)
+            results.append(self._decode(logits[first:last], regressors[first:last], tiles))
+            first = last
+        return results
+
+    def _detect(self, gray):
+        return self._run([gray])[0]
+
+    def detect_batch(self, grays):
+        if not grays:
+            return []
+        start = time.perf_counter()
+        results = self._run(grays)
+        self._record(time.perf_counter() - start, len(grays))
+        return results
+
+
+DETECTORS = {
+    HaarDetector.name: HaarDetector,
+    DnnDetector.name: DnnDetector,
+}
+
+
+def create_detector(backend="haar", **kwargs):
+    """Build a detector by name, falling back to Haar if it cannot load.
+
+    Keyword arguments a backend does not take (e.g. ``detection_width`` for
+    the tiled DNN) are ignored.
+    """
+    cls = DETECTORS.get(backend)
+    if cls is None:
+        raise ValueError(f"Unknown detector backend {backend!r} (choose from {sorted(DETECTORS)})")
+    params = inspect.signature(cls).parameters
+    try:
+        return cls(**{k: v for k, v in kwargs.items() if k in params})
+    except Exception as e:
+        if cls is HaarDetector:
+            raise
+        print(f"[Vision] Could not load {backend} detector ({e}) - using haar")
+        return create_detector("haar", **kwargs)
@@ -0,0 +1,157 @@
+"""Shared camera capture: one thread grabs frames, any number of readers use them."""
+
+import threading
+import time
+from collections import namedtuple
+
+from .stats import LatencyHistogram
+
+# image is read-only and shared between all readers - copy it before editing
+Frame = namedtuple("Frame", ["image", "timestamp", "seq"])
+
+
+class FrameSubscriber:
+    """A reader of the frame bus that tracks which frames it has seen."""
+
+    def __init__(self, bus, name):
+        self.bus = bus
+        self.name = name
+        self.last_seq = 0
+        self.received = 0
+        # Frames published while this reader was busy with an older one
+        self.dropped = 0
+
+    def _take(self, frame):
+        if frame is None or frame.seq <= self.last_seq:
+            return None
+        if self.last_seq:
+            self.dropped += frame.seq - self.last_seq - 1
+        self.last_seq = frame.seq
+        self.received += 1
+        return frame
+
+    def poll(self):
+        """Return the latest frame if it is newer than the last one read, else None."""
+        return self._take(self.bus.latest())
+
+    def wait(self, timeout=None):
+        """Block until a frame newer than the last one read arrives (or timeout)."""
+        with self.bus._new_frame:
+            self.bus._new_frame.wait_for(
+                lambda: not self.bus.running or self.bus.last_seq > self.last_seq,
+                timeout,
+            )
+        return self.poll()
+
+    def close(self):
+        """Stop reporting stats for this reader."""
+        self.bus.unsubscribe(self)
+
+
+class FrameBus:
+    """Capture thread publishing the latest camera frame into a single slot.
+
+    The capture thread never waits on readers: each new frame replaces the
+    previous one and readers pick up whatever is newest when they are ready.
+    Frames are shared without copying, so their arrays are marked read-only.
+    """
+
+    def __init__(self, media, fps=30.0, getter=None):
+        self.media = media
+        # What to call for a frame. Defaults to media.get_frame (BGR); pass a
+        # planar YUV getter when the backend has one so vision can use the
+        # Y plane without conversion (VisionSystem input_mode="nv12").
+        self.getter = getter or media.get_frame
+        self.interval = 1.0 / fps if fps else 0.0
+        self.running = False
+        self.frames_captured = 0
+        self.capture_errors = 0
+        # Time spent inside the getter per frame
+        self.grab_time = LatencyHistogram()
+        self._latest = None
+        self._new_frame = threading.Condition()
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def last_seq(self):
+        frame = self._latest
+        return frame.seq if frame is not None else 0
+
+    def start(self):
+        """Start the capture thread."""
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread and wake any waiting readers."""
+        self.running = False
+        with self._new_frame:
+            self._new_frame.notify_all()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _capture_loop(self):
+        next_capture = time.monotonic()
+        last_image = None
+        while self.running:
+            start = time.perf_counter()
+            try:
+                image = self.getter()
+                self.grab_time.record(time.perf_counter() - start)
+            except Exception as e:
+                self.capture_errors += 1
+                print(f"[FrameBus] Capture error: {e}")
+                image = None
+
+            if image is not None and image is not last_image:
+                last_image = image
+                image.flags.writeable = False
+                self.publish(image)
+
+            # Pace on deadlines so capture time is not added to the interval
+            next_capture = max(next_capture + self.interval, time.monotonic())
+            time.sleep(max(0.0, next_capture - time.monotonic()))
+
+    def publish(self, image, timestamp=None):
+        """Make a frame the latest one and wake waiting readers."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self._new_frame:
+            self.frames_captured += 1
+            self._latest = Frame(image, timestamp, self.frames_captured)
+            self._new_frame.notify_all()
+
+    def latest(self):
+        """Return the most recent frame, or None before the first capture."""
+        return self._latest
+
+    def subscribe(self, name):
+        """Register a new reader."""
+        subscriber = FrameSubscriber(self, name)
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._subscribers_lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def stats(self):
+        """Return capture counts and per-reader received/dropped frames."""
+        with self._subscribers_lock:
+            readers = {
+                s.name: {"received": s.received, "dropped": s.dropped}
+                for s in self._subscribers
+            }
+        return {
+            "captured": self.frames_captured,
+            "errors": self.capture_errors,
+            "grab": self.grab_time.summary(),
+            "subscribers": readers,
+        }
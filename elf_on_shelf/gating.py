@@ -0,0 +1,113 @@
+"""Frame gating that skips face detection when the scene has not changed."""
+
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Decide whether a frame is worth running the face detector on.
+
+    Each frame is shrunk to a tiny grayscale thumbnail and compared against
+    the previous one. Repeated frames and frames whose mean absolute
+    difference stays under ``threshold`` (0-255 scale) are skipped, but a
+    detection is forced at least every ``max_interval`` seconds so slow
+    changes are never missed for long.
+
+    ``changed_fraction`` is the share of thumbnail cells whose difference
+    exceeds ``cell_threshold``, and ``changed_spread`` the share of the
+    coarse ``region_grid`` regions that contain any such cell. Something
+    moving through part of the view changes a few regions; the whole view
+    shifting (the head turning) changes nearly all of them.
+    """
+
+    def __init__(self, threshold=3.0, max_interval=1.0, thumb_size=(32, 24),
+                 cell_threshold=25, region_grid=(4, 3)):
+        self.threshold = threshold
+        self.max_interval = max_interval
+        self.thumb_size = thumb_size
+        self.cell_threshold = cell_threshold
+        self.region_grid = region_grid
+        # Mean absolute thumbnail difference of the last frame seen
+        self.motion = 0.0
+        self.changed_fraction = 0.0
+        self.changed_spread = 0.0
+        self.frames_passed = 0
+        self.skipped_static = 0
+        self.skipped_duplicate = 0
+        self._last_frame = None
+        self._last_thumb = None
+        self._last_detect_time = 0.0
+        # Two gray thumbnails swapped every frame, plus a colour one for BGR
+        width, height = thumb_size
+        self._thumbs = [np.empty((height, width), dtype=np.uint8) for _ in range(2)]
+        self._color_thumb = np.empty((height, width, 3), dtype=np.uint8)
+        self._diff = np.empty((height, width), dtype=np.uint8)
+        self._regions = np.empty((region_grid[1], region_grid[0]), dtype=np.uint8)
+
+    def _thumbnail(self, frame):
+        """Shrink a frame into whichever thumbnail buffer is not the previous one."""
+        thumb = self._thumbs[1] if self._last_thumb is self._thumbs[0] else self._thumbs[0]
+        if frame.ndim == 3:
+            cv2.resize(frame, self.thumb_size, dst=self._color_thumb, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self._color_thumb, cv2.COLOR_BGR2GRAY, dst=thumb)
+        else:
+            cv2.resize(frame, self.thumb_size, dst=thumb, interpolation=cv2.INTER_AREA)
+        return thumb
+
+    def should_detect(self, frame, now=None):
+        """Return True if the detector should run on this frame."""
+        if now is None:
+            now = time.monotonic()
+        forced = now - self._last_detect_time >= self.max_interval
+
+        if frame is self._last_frame:
+            # The camera handed back the very same buffer
+            self.motion = 0.0
+            self.changed_fraction = 0.0
+            self.changed_spread = 0.0
+            duplicate = True
+        else:
+            thumb = self._thumbnail(frame)
+            if self._last_thumb is None:
+                self.motion = float("inf")
+                self.changed_fraction = 1.0
+                self.changed_spread = 1.0
+            else:
+                cv2.absdiff(thumb, self._last_thumb, dst=self._diff)
+                self.motion = cv2.norm(self._diff, cv2.NORM_L1) / thumb.size
+                cv2.threshold(self._diff, self.cell_threshold, 255, cv2.THRESH_BINARY,
+                              dst=self._diff)
+                self.changed_fraction = cv2.countNonZero(self._diff) / thumb.size
+                # A region is non-zero if any of its cells changed
+                cv2.resize(self._diff, self.region_grid, dst=self._regions,
+                           interpolation=cv2.INTER_AREA)
+                self.changed_spread = cv2.countNonZero(self._regions) / self._regions.size
+            duplicate = self.motion == 0.0
+            self._last_frame = frame
+            self._last_thumb = thumb
+
+        if forced or self.motion >= self.threshold:
+            self.frames_passed += 1
+            self._last_detect_time = now
+            return True
+        if duplicate:
+            self.skipped_duplicate += 1
+        else:
+            self.skipped_static += 1
+        return False
+
+    def reset(self):
+        """Forget the previous frame so the next one is always detected."""
+        self._last_frame = None
+        self._last_thumb = None
+        self._last_detect_time = 0.0
+
+    def counters(self):
+        """Return passed vs skipped frame counts."""
+        return {
+            "passed": self.frames_passed,
+            "skipped_static": self.skipped_static,
+            "skipped_duplicate": self.skipped_duplicate,
+        }
@@ -0,0 +1,95 @@
+"""Fixed-size rolling history of face detection results."""
+
+import threading
+import time
+
+import numpy as np
+
+# Boxes kept per frame; extra faces are counted but not stored
+MAX_FACES = 4
+
+DETECTION_DTYPE = np.dtype([
+    ("timestamp", np.float64),   # monotonic capture time of the frame
+    ("latency", np.float32),     # seconds from capture to result
+    ("n_faces", np.uint16),
+    ("boxes", np.int32, (MAX_FACES, 4)),  # (x, y, w, h), zero padded
+])
+
+
+class DetectionHistory:
+    """Ring buffer of detection results backed by a NumPy structured array.
+
+    Appending writes into the preallocated array in place, so recording a
+    frame allocates nothing. Queries return copies in chronological order.
+    """
+
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+        self._records = np.zeros(capacity, dtype=DETECTION_DTYPE)
+        # Per-field views, so appends write straight into the array without
+        # creating a record scalar per frame
+        self._timestamps = self._records["timestamp"]
+        self._latencies = self._records["latency"]
+        self._n_faces = self._records["n_faces"]
+        self._boxes = self._records["boxes"]
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def append(self, timestamp, latency, boxes):
+        """Record the result for one frame."""
+        n_faces = len(boxes)
+        with self._lock:
+            index = self._next
+            self._timestamps[index] = timestamp
+            self._latencies[index] = latency
+            self._n_faces[index] = n_faces
+            stored = min(n_faces, MAX_FACES)
+            if stored:
+                self._boxes[index, :stored] = boxes[:stored]
+            self._boxes[index, stored:] = 0
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def _ordered(self):
+        if self._count < self.capacity:
+            return self._records[:self._count].copy()
+        return np.concatenate((self._records[self._next:], self._records[:self._next]))
+
+    def last(self, n):
+        """Return the last ``n`` records, oldest first."""
+        with self._lock:
+            records = self._ordered()
+        return records[-n:] if n else records[:0]
+
+    def window(self, seconds, now=None):
+        """Return the records captured within the last ``seconds``."""
+        if now is None:
+            now = time.monotonic()
+        with self._lock:
+            records = self._ordered()
+        return records[records["timestamp"] >= now - seconds]
+
+    def face_fraction(self, seconds=10.0, now=None):
+        """Fraction of frames in the window that contained at least one face."""
+        records = self.window(seconds, now)
+        if not len(records):
+            return 0.0
+        return float(np.count_nonzero(records["n_faces"])) / len(records)
+
+    def mean_latency(self, seconds=10.0, now=None):
+        """Mean capture-to-result latency over the window, in seconds."""
+        records = self.window(seconds, now)
+        if not len(records):
+            return 0.0
+        return float(records["latency"].mean())
+
+    def last_seen(self):
+        """Return the timestamp of the most recent frame with a face, or None."""
+        with self._lock:
+            records = self._ordered()
+        hits = records["timestamp"][records["n_faces"] > 0]
+        return float(hits[-1]) if len(hits) else None
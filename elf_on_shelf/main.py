@@ -1,7 +1,9 @@
 """Elf on the Shelf - Magic Elf Mode for Reachy Mini."""
 
+import os
 import sys
 import time
+import queue
 import random
 import threading
 import traceback
@@ -18,13 +20,15 @@ except ImportError:
 
 # Import other modules - allow failure for debugging
 try:
-    from .vision import VisionSystem
+    from .vision import VisionSystem, FACE_APPEARED, MOTION_ALERT
+    from .frame_bus import FrameBus
     from .audio_generator import sound_player
     from .motion import RobotController
 except ImportError as e:
     print(f"CRITICAL: Failed to import local modules: {e}")
     # Define dummy classes to prevent ImportErrors from stopping the app manager immediately
     VisionSystem = None
+    FrameBus = None
     sound_player = None
     RobotController = None
 
@@ -37,6 +41,12 @@ class ElfOnShelf(ReachyMiniApp):
     
     custom_app_url: Optional[str] = None
     request_media_backend: Optional[str] = None  # Let SDK auto-detect
+    # Face detector: "haar" (cascade) or "dnn" (bundled BlazeFace model)
+    detector: str = os.environ.get("ELF_DETECTOR", "haar")
+    # Where face detection runs: "thread" (the vision thread) or "process"
+    # (a pool of detector_workers processes, for hosts with spare cores)
+    detector_backend: str = os.environ.get("ELF_DETECTOR_BACKEND", "thread")
+    detector_workers: int = int(os.environ.get("ELF_DETECTOR_WORKERS", "2"))
 
     def run(self, reachy_mini: ReachyMini, stop_event: threading.Event) -> None:
         """Main application loop implementing Magic Elf Mode."""
@@ -75,8 +85,16 @@ class ElfOnShelf(ReachyMiniApp):
             print(f"[Init] ⚠️  Media initialization warning: {e}")
         
         # 3. Set up subsystems
+        frame_bus = None
         try:
-            vision = VisionSystem(reachy_mini=reachy_mini)
+            # One capture thread shared by every camera consumer
+            if reachy_mini.media:
+                frame_bus = FrameBus(reachy_mini.media)
+                frame_bus.start()
+            vision = VisionSystem(reachy_mini=reachy_mini, frame_bus=frame_bus,
+                                  detector=self.detector,
+                                  detector_backend=self.detector_backend,
+                                  detector_workers=self.detector_workers)
             vision.start()
             print("[Init] ✅ Vision system started")
             
@@ -89,6 +107,22 @@ class ElfOnShelf(ReachyMiniApp):
             print(f"[Init] ❌ Subsystem initialization failed: {e}")
             return
         
+        # Something moving into view: stop straight away, from the vision
+        # thread, while detection confirms whether it is a face. A face
+        # starts timing the catch from its frame's capture time.
+        def on_vision_event(event):
+            if event.kind == MOTION_ALERT:
+                controller.pre_freeze()
+            elif event.kind == FACE_APPEARED:
+                controller.reaction.begin(event.timestamp)
+
+        vision.add_listener(on_vision_event)
+        # The robot's own head moves shift the whole view; don't alert on those
+        vision.ego_motion = controller.head_moving
+
+        # Face appeared/lost events wake the loop as soon as they happen
+        face_events = vision.event_queue()
+
         # State variables
         was_face_detected = False
         last_jingle_time = time.time()
@@ -148,8 +182,11 @@ class ElfOnShelf(ReachyMiniApp):
                         last_jingle_time = current_time
                         next_jingle_delay = random.uniform(10.0, 15.0)
                 
-                # Small sleep to prevent CPU hogging
-                time.sleep(0.1)
+                # Sleep until the next face event, or 100 ms for the idle timers
+                try:
+                    face_events.get(timeout=0.1)
+                except queue.Empty:
+                    pass
                 
         except KeyboardInterrupt:
             print("\n[Shutdown] Keyboard interrupt")
@@ -158,12 +195,44 @@ class ElfOnShelf(ReachyMiniApp):
             traceback.print_exc()
         finally:
             print("\n[Shutdown] Cleaning up...")
+            # Motors first, on their own, so a failing report cannot skip them
             try:
-                vision.stop()
+                controller.close()
                 controller.unfreeze()
+            except Exception as e:
+                print(f"[Shutdown] Motion stop error: {e}")
+            try:
                 reachy_mini.disable_motors()
-            except Exception:
-                pass
+            except Exception as e:
+                print(f"[Shutdown] Motor disable error: {e}")
+            try:
+                sound_player.stop()
+            except Exception as e:
+                print(f"[Shutdown] Sound stop error: {e}")
+            try:
+                # Bus stats list live subscribers, so read them before vision closes its own
+                bus_stats = frame_bus.stats() if frame_bus is not None else None
+                vision.stop()
+                if frame_bus is not None:
+                    frame_bus.stop()
+            except Exception as e:
+                bus_stats = None
+                print(f"[Shutdown] Vision stop error: {e}")
+            try:
+                print(f"[Shutdown] Vision: {vision.status}")
+                print(f"[Shutdown] Face detector: {vision.detector_latency()}")
+                if bus_stats is not None:
+                    print(f"[Shutdown] Frame bus stats: {bus_stats}")
+                print(f"[Shutdown] Motion: {controller.executor.counters()}, "
+                      f"holds from cache {controller.cached_holds}, stale {controller.stale_holds}")
+                print(f"[Shutdown] Robot state: {controller.state.stats()}")
+                print(f"[Shutdown] Robot commands: {controller.commands.counters()}")
+                print(f"[Shutdown] Pre-freeze: {controller.prefreeze_stats()}")
+                print(f"[Shutdown] Caught latency: {controller.reaction.summary()}")
+                print(f"[Shutdown] Animations: {controller.animation_stats.summary()}")
+                print(f"[Shutdown] Sound: {sound_player.stats()}")
+            except Exception as e:
+                print(f"[Shutdown] Report error: {e}")
             print("🎄 Elf on the Shelf - Goodbye! 🎄")
 
 
@@ -2,11 +2,129 @@ import time
 import random
 import threading
 
+from .animation import PlaybackStats, load_animations
+from .command_queue import CommandQueue
+from .motion_executor import MotionExecutor
+from .reaction import STILL_HEAD_ANGULAR, STILL_HEAD_LINEAR, ReactionTracer
+from .robot_state import RobotStateCache
+from .stats import LatencyHistogram
+
+# How long a speculative hold lasts unless a face is confirmed in the meantime
+PRE_FREEZE_HOLD = 0.6
+
+# How long after its own head command the robot still counts as moving
+EGO_MOTION_SETTLE = 0.3
+
+# Where act_alive looks: points in front of the robot, in metres
+ALIVE_X = (0.3, 0.5)
+ALIVE_Y = (-0.4, 0.4)
+ALIVE_Z = (-0.1, 0.3)
+
+
+class HeadPoseTable:
+    """Head poses for looking at random points in the act_alive region.
+
+    Solving a look-at pose per move is wasted work when the region never
+    changes, so ``size`` points are drawn uniformly from it once and their
+    poses solved with ``look_at_world(..., perform_movement=False)``.
+    Points the robot rejects are left out. Poses depend only on the target
+    point, so the table stays valid for the whole session.
+    """
+
+    def __init__(self, reachy, size=64):
+        self.reachy = reachy
+        self.size = size
+        self.poses = []
+        self.rejected = 0
+        self.build_time = 0.0
+        self.ready = False
+
+    def build(self):
+        start = time.perf_counter()
+        poses = []
+        for _ in range(self.size):
+            x = random.uniform(*ALIVE_X)
+            y = random.uniform(*ALIVE_Y)
+            z = random.uniform(*ALIVE_Z)
+            try:
+                pose = self.reachy.look_at_world(x=x, y=y, z=z, perform_movement=False)
+            except Exception:
+                pose = None
+            if pose is None:
+                self.rejected += 1
+                continue
+            poses.append(pose)
+        self.poses = poses
+        self.build_time = time.perf_counter() - start
+        self.ready = True
+        print(f"[Motion] {len(poses)} head poses cached in {self.build_time * 1000:.0f} ms "
+              f"({self.rejected} rejected)")
+
+    def build_in_background(self):
+        threading.Thread(target=self.build, daemon=True).start()
+
+    def choice(self):
+        """Return a random cached pose, or None until the table is built."""
+        poses = self.poses
+        return random.choice(poses) if poses else None
+
+
 class RobotController:
     def __init__(self, reachy):
         self.reachy = reachy
         self.is_frozen = False
         self._stop_event = threading.Event()
+        # Latest measured pose, kept fresh in the background for freeze()
+        self.state = RobotStateCache(reachy)
+        self.state.start()
+        # Every head/antenna command goes out through here, merged and
+        # rate-limited, from one thread; gotos are streamed, never blocking
+        self.commands = CommandQueue(reachy, state=self.state)
+        self.commands.start()
+        # Animations run here, so callers never wait on them and freeze()
+        # can drop one mid-move
+        self.executor = MotionExecutor()
+        self.executor.start()
+        self.cached_holds = 0
+        self.stale_holds = 0
+        # Frame capture to standing still, for each catch
+        self.reaction = ReactionTracer(self.state)
+        # act_alive head targets, solved once up front
+        self.head_poses = HeadPoseTable(reachy)
+        self.head_poses.build_in_background()
+        # Expressions are keyframe timelines, interpolated once up front
+        self.animations = load_animations()
+        self.animation_stats = PlaybackStats()
+        threading.Thread(target=self._compile_animations, daemon=True).start()
+        # Speculative hold (pre_freeze): no new motion until this time
+        self._hold_until = 0.0
+        self._hold_started = None
+        self.prefreeze_count = 0
+        self.prefreeze_confirmed = 0
+        self.prefreeze_false = 0
+        # How much earlier the robot stopped than the confirmed freeze
+        self.prefreeze_lead = LatencyHistogram()
+
+    def _solve_look(self, x, y, z):
+        try:
+            return self.reachy.look_at_world(x=x, y=y, z=z, perform_movement=False)
+        except Exception:
+            return None
+
+    def _compile_animations(self):
+        start = time.perf_counter()
+        for animation in self.animations.values():
+            if animation.frames is None:
+                animation.compile(self._solve_look)
+        print(f"[Motion] {len(self.animations)} animations compiled in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _animation_steps(self, name):
+        animation = self.animations[name]
+        if animation.frames is None:
+            # Still compiling in the background; do this one now
+            animation.compile(self._solve_look)
+        yield from animation.steps(self.commands, self.animation_stats)
 
     def set_compliant(self, compliant=False):
         """Set compliance for head and antennas."""
@@ -15,106 +133,192 @@ class RobotController:
         else:
             self.reachy.enable_motors()
 
+    def _hold_position(self, on_sent=None):
+        # Hold the current pose, from the background cache when it is fresh
+        # so no round trip is needed before the hold goes out
+        state = self.state.latest()
+        if state is not None:
+            self.cached_holds += 1
+        else:
+            self.stale_holds += 1
+            state = self.state.refresh()
+            if state is None:
+                raise RuntimeError("could not read the robot pose")
+        self.commands.set_target(head=state.head, antennas=state.antennas, urgent=True,
+                                 on_sent=on_sent)
+
+    def head_moving(self, timestamp=None):
+        """Whether the robot is moving its own head at ``timestamp`` (monotonic).
+
+        True while a head command sent by us is running, for
+        ``EGO_MOTION_SETTLE`` after it, or while the state cache measures
+        the head moving. Vision uses it to tell camera motion caused by the
+        robot from motion in the scene.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if timestamp < self.commands.head_moving_until + EGO_MOTION_SETTLE:
+            return True
+        velocity = self.state.velocity
+        return (velocity is not None and self.state.latest() is not None
+                and (velocity.head_linear >= STILL_HEAD_LINEAR
+                     or velocity.head_angular >= STILL_HEAD_ANGULAR))
+
     def freeze(self):
         """Immediately stop movement and hold position."""
         if self.is_frozen:
             return
+        self._confirm_hold()
         self.is_frozen = True
-        # Read current head pose and set it as target to hold it
+        self.executor.cancel()
         try:
-            current_head = self.reachy.get_current_head_pose()
-            current_antennas = self.reachy.get_present_antenna_joint_positions()
-            self.reachy.set_target(head=current_head, antennas=current_antennas)
+            self._hold_position(self.reaction.on_sent("hold"))
         except Exception as e:
             print(f"[Motion] Freeze error: {e}")
-        
+
+    @property
+    def holding(self):
+        """Whether a speculative pre-freeze hold is in effect."""
+        return time.monotonic() < self._hold_until
+
+    def pre_freeze(self, hold=PRE_FREEZE_HOLD):
+        """Stop moving now, on a hint that someone may be about to look.
+
+        Safe to call from the vision thread. Holds position for ``hold``
+        seconds (extended by further calls); a face confirmed in that time
+        turns it into a real freeze, otherwise motion simply resumes.
+        """
+        if self.is_frozen:
+            return
+        now = time.monotonic()
+        if now >= self._hold_until:
+            self._settle_hold(now)
+            self.prefreeze_count += 1
+            self._hold_started = now
+            self.executor.cancel()
+            try:
+                self._hold_position()
+            except Exception as e:
+                print(f"[Motion] Pre-freeze error: {e}")
+        self._hold_until = now + hold
+
+    def _confirm_hold(self):
+        """A face was confirmed: credit the pending hold with its head start."""
+        now = time.monotonic()
+        self._settle_hold(now)
+        if self._hold_started is not None:
+            self.prefreeze_confirmed += 1
+            self.prefreeze_lead.record(now - self._hold_started)
+            self._hold_started = None
+
+    def _settle_hold(self, now):
+        """Count a hold that expired without a face as a false alarm."""
+        if self._hold_started is not None and now >= self._hold_until:
+            self.prefreeze_false += 1
+            self._hold_started = None
+
+    def close(self):
+        """Stop any motion in progress and the motion and state threads."""
+        self.executor.stop()
+        self.state.stop()
+        self.commands.stop()
+
+    def prefreeze_stats(self):
+        """Return speculative hold counts and how early they stopped the robot."""
+        self._settle_hold(time.monotonic())
+        return {
+            "holds": self.prefreeze_count,
+            "confirmed": self.prefreeze_confirmed,
+            "false_alarms": self.prefreeze_false,
+            "lead": self.prefreeze_lead.summary(),
+        }
+
     def express_surprise(self):
         """Show a 'Guilty/Shocked' expression before freezing."""
         if self.is_frozen: return
-        
+        self.reaction.mark("react")
+        self._confirm_hold()
+        # Frozen from now on: nothing else may start, and the surprise
+        # itself ends by holding position
+        self.is_frozen = True
+        self.executor.cancel()
+        self.executor.submit("surprise", self._surprise_steps)
+
+    def _surprise_steps(self):
         # 1. Pop antennas out (Shock!)
         try:
             # Wide antennas = Shock
-            self.reachy.set_target(antennas=[0.6, -0.6]) # Instant move
+            self.commands.set_target(antennas=[0.6, -0.6], urgent=True, # Instant move
+                                     on_sent=self.reaction.on_sent("surprise"))
             # Small delay to let user see the shock
-            time.sleep(0.2)
+            yield 0.2
         except Exception as e:
             print(f"[Motion] Express surprise error: {e}")
         
         # 2. Then Freeze
-        self.freeze()
+        self._hold_position(self.reaction.on_sent("hold"))
         
     def unfreeze(self):
         """Resume ability to move."""
         self.is_frozen = False
+        self._hold_until = 0.0
 
     def look_at(self, x, y, z, duration=1.0):
-        if self.is_frozen: return
-        self.reachy.look_at_world(x, y, z, duration=duration)
+        if self.is_frozen or self.holding: return
+        self.executor.submit("look_at", self._look_at_steps, x, y, z, duration)
+
+    def _look_at_steps(self, x, y, z, duration):
+        self.commands.look_at_world(x, y, z, duration=duration)
+        yield duration
 
     def act_alive(self):
         """Perform random, jolly movements to simulate being alive."""
-        if self.is_frozen: return
-        
+        if self.is_frozen or self.holding: return
+        # Still busy with the last one; skip rather than pile up moves
+        if self.executor.busy: return
+        self.executor.submit("act_alive", self._act_alive_steps)
+
+    def _act_alive_steps(self):
         # Random gentle head movements with a "jolly" cadence
-        x = random.uniform(0.3, 0.5)
-        y = random.uniform(-0.4, 0.4)
-        z = random.uniform(-0.1, 0.3)
         duration = random.uniform(1.0, 2.5)
+        start = time.monotonic()
 
         try:
-            self.reachy.look_at_world(x=x, y=y, z=z, duration=duration)
+            pose = self.head_poses.choice()
+            if pose is not None:
+                self.commands.goto_target(head=pose, duration=duration)
+            else:
+                # Table not built yet: solve this one on the spot
+                self.commands.look_at_world(
+                    x=random.uniform(*ALIVE_X),
+                    y=random.uniform(*ALIVE_Y),
+                    z=random.uniform(*ALIVE_Z),
+                    duration=duration,
+                )
             
             # Occasionally wiggle antennas happily
             if random.random() > 0.6:
-                self.wiggle_antennas()
+                # One command per step, so a cancel can land in between
+                yield 0
+                yield from self._animation_steps("wiggle")
         except Exception as e:
             print(f"[Motion] Act alive error: {e}")
+        # Stay busy until the head move is over, so act_alive doesn't stack moves
+        yield max(0.0, duration - (time.monotonic() - start))
 
     def wiggle_antennas(self):
-        if self.is_frozen: return
-        # Jolly wiggle
-        try:
-            current = self.reachy.get_present_antenna_joint_positions()
-            # Wiggle around current frame or neutral
-            self.reachy.goto_target(antennas=[0.5, -0.5], duration=0.2)
-            time.sleep(0.2)
-            self.reachy.goto_target(antennas=[-0.5, 0.5], duration=0.2)
-            time.sleep(0.2)
-            self.reachy.goto_target(antennas=[0.0, 0.0], duration=0.2) # Return to neutral
-        except Exception as e:
-            print(f"[Motion] Wiggle antennas error: {e}")
+        if self.is_frozen or self.holding: return
+        self.executor.submit("wiggle", self._animation_steps, "wiggle")
 
     def perform_scan_animation(self):
         """Animation for Naughty/Nice scanning."""
-        if self.is_frozen: return
-        
-        # Tilt antennas
-        for _ in range(3):
-            self.reachy.goto_target(antennas=[0.8, -0.8], duration=0.3)
-            time.sleep(0.3)
-            self.reachy.goto_target(antennas=[-0.2, 0.2], duration=0.3)
-            time.sleep(0.3)
+        if self.is_frozen or self.holding: return
+        self.executor.submit("scan", self._animation_steps, "scan")
 
     def express_joy(self):
         """Happy animation."""
-        # Nodding
-        self.reachy.look_at_world(0.5, 0, 0, duration=0.5)
-        time.sleep(0.5)
-        self.reachy.look_at_world(0.5, 0, -0.2, duration=0.3)
-        time.sleep(0.3)
-        self.reachy.look_at_world(0.5, 0, 0, duration=0.3)
+        self.executor.submit("joy", self._animation_steps, "joy")
 
     def express_sadness(self):
         """Sad animation."""
-        # Look down and shake head
-        self.reachy.look_at_world(0.4, 0, -0.4, duration=1.0)
-        time.sleep(1.0)
-        
-        # Shake implementation via look_at (approximate)
-        # Ideally would use joint control but look_at is safer
-        self.reachy.look_at_world(0.4, 0.1, -0.4, duration=0.3)
-        time.sleep(0.3)
-        self.reachy.look_at_world(0.4, -0.1, -0.4, duration=0.3)
-        time.sleep(0.3)
-        self.reachy.look_at_world(0.4, 0, -0.4, duration=0.3)
+        self.executor.submit("sadness", self._animation_steps, "sadness")
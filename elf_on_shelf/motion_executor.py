@@ -0,0 +1,124 @@
+"""Background thread that plays motion primitives and can drop them instantly."""
+
+import queue
+import threading
+import time
+
+from .stats import LatencyHistogram
+
+
+class MotionExecutor:
+    """Run queued motion primitives one at a time on a dedicated thread.
+
+    A primitive is a generator function: it sends commands to the robot and
+    ``yield``s the number of seconds to wait before its next step. Steps
+    must not block: send through the CommandQueue, one command per step
+    (``yield 0`` between commands with no wait), so a cancel can land
+    between any two of them. Waits are
+    interruptible, so :meth:`cancel` stops the running primitive at its next
+    step (or immediately, if it is waiting) and discards everything queued.
+    Callers never block on motion: :meth:`submit` only enqueues, and
+    :meth:`cancel` waits at most for a step that is mid-send to finish.
+    """
+
+    def __init__(self, name="motion"):
+        self.name = name
+        self.running = False
+        self.current = None
+        self.completed = 0
+        self.cancelled = 0
+        self.errors = 0
+        # From cancel() to the running primitive actually stopping
+        self.cancel_latency = LatencyHistogram()
+        self._queue = queue.Queue()
+        # Bumped by cancel(); primitives submitted before it are dropped
+        self._generation = 0
+        self._cancel_time = None
+        self._wake = threading.Event()
+        # Held while a step sends its commands
+        self._step_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def busy(self):
+        """Whether a primitive is running or waiting to run."""
+        return self.current is not None or not self._queue.empty()
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Cancel all motion and stop the thread."""
+        self.running = False
+        self.cancel()
+        self._queue.put(None)
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def submit(self, name, primitive, *args):
+        """Queue ``primitive(*args)`` to run after whatever is already queued."""
+        self._queue.put((self._generation, name, primitive, args))
+
+    def cancel(self):
+        """Stop the running primitive and drop all queued ones.
+
+        On return no further command from them will be sent, so the caller
+        can safely send its own (e.g. a hold) right after.
+        """
+        self._generation += 1
+        if self.current is not None:
+            self._cancel_time = time.perf_counter()
+        self._wake.set()
+        with self._step_lock:
+            pass
+
+    def _run(self):
+        while self.running:
+            item = self._queue.get()
+            if item is None:
+                break
+            generation, name, primitive, args = item
+            if generation != self._generation:
+                continue
+            self.current = name
+            self._wake.clear()
+            try:
+                self._play(generation, primitive(*args))
+            except Exception as e:
+                self.errors += 1
+                print(f"[Motion] {name} error: {e}")
+            finally:
+                self.current = None
+
+    def _play(self, generation, steps):
+        while True:
+            # Checked before every step, so nothing is sent once cancelled
+            if generation != self._generation:
+                steps.close()
+                self.cancelled += 1
+                if self._cancel_time is not None:
+                    self.cancel_latency.record(time.perf_counter() - self._cancel_time)
+                    self._cancel_time = None
+                return
+            with self._step_lock:
+                if generation != self._generation:
+                    continue
+                try:
+                    delay = next(steps)
+                except StopIteration:
+                    self.completed += 1
+                    return
+            if delay:
+                self._wake.wait(delay)
+
+    def counters(self):
+        return {
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "errors": self.errors,
+            "cancel_latency": self.cancel_latency.summary(),
+        }
@@ -0,0 +1,76 @@
+"""Decode WAV files into float32 PCM buffers in the audio output's format."""
+
+import wave
+
+import numpy as np
+
+# Taps of the low-pass filter applied before downsampling
+_LOWPASS_TAPS = 63
+
+
+def read_wav(path):
+    """Return (samples, rate): float32 in [-1, 1], shaped (frames, channels)."""
+    with wave.open(str(path), "rb") as f:
+        channels = f.getnchannels()
+        width = f.getsampwidth()
+        rate = f.getframerate()
+        data = f.readframes(f.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    elif width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        # Little-endian 24-bit, placed in the top bytes of an int32 to keep the sign
+        packed = (raw[:, 0].astype(np.int32) << 8) | (raw[:, 1].astype(np.int32) << 16) \
+            | (raw[:, 2].astype(np.int32) << 24)
+        samples = packed.astype(np.float32) / 2147483648.0
+    elif width == 4:
+        samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+    return samples.reshape(-1, channels), rate
+
+
+def _lowpass(samples, cutoff):
+    """Windowed-sinc low-pass; ``cutoff`` is a fraction of the sample rate."""
+    n = np.arange(_LOWPASS_TAPS) - (_LOWPASS_TAPS - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(_LOWPASS_TAPS)
+    taps /= taps.sum()
+    return np.stack([np.convolve(samples[:, c], taps, mode="same")
+                     for c in range(samples.shape[1])], axis=1)
+
+
+def resample(samples, rate, target_rate):
+    """Linear-interpolation resampling, low-passed first when going down."""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    if target_rate < rate:
+        samples = _lowpass(samples, 0.5 * target_rate / rate)
+    frames = int(round(len(samples) * target_rate / rate))
+    positions = np.arange(frames) * (rate / target_rate)
+    source = np.arange(len(samples))
+    return np.stack([np.interp(positions, source, samples[:, c])
+                     for c in range(samples.shape[1])], axis=1)
+
+
+def match_channels(samples, channels):
+    """Up-mix by repeating, down-mix by averaging."""
+    if samples.shape[1] == channels:
+        return samples
+    if samples.shape[1] == 1:
+        return np.repeat(samples, channels, axis=1)
+    mono = samples.mean(axis=1, keepdims=True)
+    return mono if channels == 1 else np.repeat(mono, channels, axis=1)
+
+
+def load_pcm(path, rate=None, channels=None):
+    """Read a WAV and convert it to ``rate`` and ``channels`` (None keeps the file's)."""
+    samples, source_rate = read_wav(path)
+    if channels:
+        samples = match_channels(samples, channels)
+    if rate:
+        samples = resample(samples, source_rate, rate)
+    else:
+        rate = source_rate
+    return np.ascontiguousarray(samples, dtype=np.float32), rate
@@ -0,0 +1,123 @@
+"""End-to-end "caught" latency: from the camera frame to the robot standing still."""
+
+import threading
+import time
+
+from .stats import StageTimer
+
+# Stages of a catch, each timed from the capture of the frame with the face:
+#   detect    FACE_APPEARED published by the vision thread
+#   react     main loop starts the surprise
+#   surprise  surprise antenna pop sent to the robot
+#   hold      hold-position command sent to the robot
+#   still     joints measured at rest after the hold
+STAGES = ("detect", "react", "surprise", "hold", "still")
+
+# Below these speeds (between two state reads) the robot counts as still
+STILL_HEAD_LINEAR = 0.005   # m/s
+STILL_HEAD_ANGULAR = 0.05   # rad/s
+STILL_ANTENNAS = 0.1        # rad/s
+# Give up on standstill this long after the hold went out
+STILL_TIMEOUT = 2.0
+
+
+def is_still(velocity):
+    return (velocity.head_linear < STILL_HEAD_LINEAR
+            and velocity.head_angular < STILL_HEAD_ANGULAR
+            and velocity.antennas < STILL_ANTENNAS)
+
+
+class ReactionTracer:
+    """Follow one catch at a time through every stage, into per-stage histograms.
+
+    :meth:`begin` starts a trace from a frame capture time; :meth:`mark`
+    and the callbacks from :meth:`on_sent` record later stages, from
+    whichever thread reaches them. Standstill is taken from the robot state
+    cache's measured velocity, so its resolution is one polling interval.
+    Each finished catch is printed as it happens.
+    """
+
+    def __init__(self, state_cache=None):
+        self.timer = StageTimer(*STAGES)
+        self.traces = 0
+        self.completed = 0
+        self.unsettled = 0
+        self.abandoned = 0
+        self._capture = None
+        self._trace_id = 0
+        self._marks = {}
+        self._lock = threading.Lock()
+        if state_cache is not None:
+            state_cache.add_listener(self._on_state)
+
+    @property
+    def active(self):
+        return self._capture is not None
+
+    def begin(self, capture_time):
+        """Start tracing a catch seen in the frame captured at ``capture_time``."""
+        now = time.monotonic()
+        with self._lock:
+            if self._capture is not None:
+                self.abandoned += 1
+            self._trace_id += 1
+            self.traces += 1
+            self._capture = capture_time
+            self._marks = {}
+            self._mark("detect", now)
+
+    def mark(self, stage, when=None):
+        """Record that the current catch reached ``stage`` (first time only)."""
+        with self._lock:
+            self._mark(stage, time.monotonic() if when is None else when)
+
+    def on_sent(self, stage):
+        """Return a CommandQueue ``on_sent`` callback that marks ``stage``."""
+        trace_id = self._trace_id
+
+        def sent(when):
+            with self._lock:
+                if trace_id == self._trace_id:
+                    self._mark(stage, when)
+        return sent
+
+    def _mark(self, stage, when):
+        if self._capture is None or stage in self._marks:
+            return
+        self._marks[stage] = when
+        self.timer.record(stage, max(0.0, when - self._capture))
+
+    def _on_state(self, state, velocity):
+        with self._lock:
+            hold = self._marks.get("hold")
+            if self._capture is None or hold is None or state.timestamp < hold:
+                return
+            if velocity is not None and is_still(velocity):
+                self._mark("still", state.timestamp)
+                self.completed += 1
+            elif state.timestamp - hold > STILL_TIMEOUT:
+                self.unsettled += 1
+            else:
+                return
+            marks = self._marks
+            capture = self._capture
+            self._capture = None
+        self._report(capture, marks)
+
+    def _report(self, capture, marks):
+        parts = ", ".join(f"{stage} {(marks[stage] - capture) * 1000:.0f}"
+                          for stage in STAGES if stage in marks)
+        if "still" in marks:
+            print(f"[Motion] Caught: still {(marks['still'] - capture) * 1000:.0f} ms "
+                  f"after capture ({parts} ms)")
+        else:
+            print(f"[Motion] Caught: not still {STILL_TIMEOUT:.0f} s after the hold ({parts} ms)")
+
+    def summary(self):
+        return {
+            "traces": self.traces,
+            "completed": self.completed,
+            "unsettled": self.unsettled,
+            "abandoned": self.abandoned,
+            "stages": self.timer.summary(),
+        }
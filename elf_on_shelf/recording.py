@@ -0,0 +1,202 @@
+"""Record camera sessions to disk and replay them as a fake media source.
+
+File layout (little endian), append-only:
+
+    b"ELFREC01"
+    repeated: timestamp f64 | seq u64 | height u32 | width u32 | channels u32 | image bytes
+
+The reader memory-maps the file, so frames are served as read-only views
+without copying, and a recording that is still being written can be
+reopened to pick up the frames appended so far.
+
+Record from the robot with:
+
+    python -m elf_on_shelf.recording session.elfrec --seconds 120
+"""
+
+import struct
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b"ELFREC01"
+_RECORD = struct.Struct("<dQIII")
+
+
+class FrameRecorder:
+    """Append camera frames and their timestamps to a recording file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.frames = 0
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+
+    def write(self, image, timestamp=None, seq=None):
+        """Append one frame (uint8, HxW or HxWxC)."""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        channels = image.shape[2] if image.ndim == 3 else 1
+        with self._lock:
+            self.frames += 1
+            header = _RECORD.pack(timestamp, seq or self.frames, image.shape[0], image.shape[1], channels)
+            self._file.write(header)
+            self._file.write(image.data)
+            self._file.flush()
+
+    def attach(self, frame_bus):
+        """Record every frame published on a FrameBus, from a background thread."""
+        reader = frame_bus.subscribe("recorder")
+        self._running = True
+
+        def loop():
+            while self._running:
+                frame = reader.wait(timeout=0.5)
+                if frame is not None:
+                    self.write(frame.image, frame.timestamp, frame.seq)
+            reader.close()
+
+        self._thread = threading.Thread(target=loop, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        with self._lock:
+            self._file.close()
+
+
+class Recording:
+    """Read-only, memory-mapped view of a recording file."""
+
+    def __init__(self, path):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode="r")
+        if bytes(self._data[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f"{path} is not an elf_on_shelf recording")
+        self.timestamps = []
+        self.seqs = []
+        self._frames = []
+        self._index()
+
+    def _index(self):
+        offset = len(MAGIC)
+        end = len(self._data)
+        while offset + _RECORD.size <= end:
+            timestamp, seq, height, width, channels = _RECORD.unpack_from(self._data, offset)
+            offset += _RECORD.size
+            nbytes = height * width * channels
+            if offset + nbytes > end:
+                break  # Frame still being written
+            shape = (height, width, channels) if channels > 1 else (height, width)
+            self._frames.append(self._data[offset:offset + nbytes].reshape(shape))
+            self.timestamps.append(timestamp)
+            self.seqs.append(seq)
+            offset += nbytes
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getitem__(self, index):
+        return self._frames[index]
+
+    @property
+    def duration(self):
+        return self.timestamps[-1] - self.timestamps[0] if self._frames else 0.0
+
+
+class ReplayMedia:
+    """Stand-in for ``reachy_mini.media`` that serves frames from a recording.
+
+    With ``realtime=True`` ``get_frame()`` returns whichever frame was live
+    at the same offset in the original session, like a real camera. With
+    ``realtime=False`` every call returns the next frame, as fast as the
+    caller can consume them. ``None`` is returned once the recording ends
+    (unless ``loop`` is set).
+    """
+
+    camera = "replay"
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.recording = Recording(path) if isinstance(path, str) else path
+        self.realtime = realtime
+        self.loop = loop
+        self.finished = False
+        self._next = 0
+        self._start = None
+
+    def get_frame(self):
+        count = len(self.recording)
+        if not count:
+            return None
+        if self.realtime:
+            now = time.monotonic()
+            if self._start is None:
+                self._start = now
+            elapsed = now - self._start
+            duration = self.recording.duration
+            if elapsed > duration:
+                if not self.loop:
+                    self.finished = True
+                    return None
+                # Wrap around to the start of the session
+                self._start = now - (elapsed % duration if duration else 0.0)
+                elapsed = now - self._start
+                self._next = 0
+            timestamps = self.recording.timestamps
+            while self._next + 1 < count and timestamps[self._next + 1] - timestamps[0] <= elapsed:
+                self._next += 1
+            return self.recording[self._next]
+
+        if self._next >= count:
+            if not self.loop:
+                self.finished = True
+                return None
+            self._next = 0
+        frame = self.recording[self._next]
+        self._next += 1
+        return frame
+
+
+class ReplayRobot:
+    """Minimal robot stand-in so ``VisionSystem(reachy_mini=...)`` can replay."""
+
+    def __init__(self, path, realtime=True, loop=False):
+        self.media = ReplayMedia(path, realtime=realtime, loop=loop)
+
+
+def main():
+    import argparse
+    from reachy_mini import ReachyMini
+    from .frame_bus import FrameBus
+
+    parser = argparse.ArgumentParser(description="Record the Reachy Mini camera to a file.")
+    parser.add_argument("output", help="Recording file to write")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--remote", action="store_true", help="Connect over the network")
+    args = parser.parse_args()
+
+    reachy = ReachyMini(localhost_only=not args.remote)
+    bus = FrameBus(reachy.media)
+    recorder = FrameRecorder(args.output)
+    bus.start()
+    recorder.attach(bus)
+    print(f"[Record] Recording {args.seconds:.0f}s to {args.output}...")
+    try:
+        time.sleep(args.seconds)
+    except KeyboardInterrupt:
+        pass
+    recorder.close()
+    bus.stop()
+    print(f"[Record] Wrote {recorder.frames} frames")
+    reachy.media.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Background cache of the robot's measured pose."""
+
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .stats import LatencyHistogram
+
+# head is the 4x4 head pose, antennas the [right, left] joint positions;
+# timestamp is the monotonic time the reads started (a lower bound on age)
+RobotState = namedtuple("RobotState", ["head", "antennas", "timestamp"])
+
+# Measured between two consecutive reads: head translation (m/s), head
+# rotation (rad/s) and the fastest antenna joint (rad/s)
+Velocity = namedtuple("Velocity", ["head_linear", "head_angular", "antennas"])
+
+
+def velocity_between(previous, state):
+    """Average velocity from ``previous`` to ``state``, or None if they coincide."""
+    dt = state.timestamp - previous.timestamp
+    if dt <= 0:
+        return None
+    a = np.asarray(previous.head, dtype=np.float64)
+    b = np.asarray(state.head, dtype=np.float64)
+    linear = np.linalg.norm(b[:3, 3] - a[:3, 3]) / dt
+    # Angle of the relative rotation a^T b
+    cos_angle = (np.trace(a[:3, :3].T @ b[:3, :3]) - 1.0) / 2.0
+    angular = np.arccos(np.clip(cos_angle, -1.0, 1.0)) / dt
+    antennas = np.max(np.abs(np.subtract(state.antennas, previous.antennas))) / dt
+    return Velocity(float(linear), float(angular), float(antennas))
+
+
+class RobotStateCache:
+    """Keep the latest head pose and antenna positions, read on a thread.
+
+    Reading the pose is a round trip to the robot. Doing it on a background
+    thread at ``interval`` means latency-critical code (freezing) can use
+    the last reading instead of waiting. :meth:`latest` refuses readings
+    older than ``max_age`` seconds, so callers know when to fall back.
+    """
+
+    def __init__(self, reachy, interval=0.05, max_age=0.25):
+        self.reachy = reachy
+        self.interval = interval
+        self.max_age = max_age
+        self.running = False
+        self.reads = 0
+        self.errors = 0
+        self.read_time = LatencyHistogram()
+        self.velocity = None
+        self._state = None
+        self._listeners = []
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._thread = threading.Thread(target=self._poll_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+
+    def _poll_loop(self):
+        next_read = time.monotonic()
+        while self.running:
+            self.refresh()
+            next_read = max(next_read + self.interval, time.monotonic())
+            self._wake.wait(max(0.0, next_read - time.monotonic()))
+
+    def refresh(self):
+        """Read the robot now and update the cache; returns the new state or None."""
+        started = time.monotonic()
+        try:
+            head = self.reachy.get_current_head_pose()
+            antennas = self.reachy.get_present_antenna_joint_positions()
+        except Exception as e:
+            self.errors += 1
+            if self.errors == 1 or self.errors % 100 == 0:
+                print(f"[Motion] State read error ({self.errors}): {e}")
+            return None
+        self.read_time.record(time.monotonic() - started)
+        self.reads += 1
+        state = RobotState(head, antennas, started)
+        previous = self._state
+        if previous is not None:
+            self.velocity = velocity_between(previous, state)
+        self._state = state
+        for callback in list(self._listeners):
+            try:
+                callback(state, self.velocity)
+            except Exception as e:
+                print(f"[Motion] State listener error: {e}")
+        return state
+
+    def add_listener(self, callback):
+        """Call ``callback(state, velocity)`` after every read, on the reading thread."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def latest(self, max_age=None):
+        """Return the newest state if it is fresh enough, else None."""
+        state = self._state
+        if state is None:
+            return None
+        limit = self.max_age if max_age is None else max_age
+        if time.monotonic() - state.timestamp > limit:
+            return None
+        return state
+
+    def stats(self):
+        state = self._state
+        return {
+            "reads": self.reads,
+            "errors": self.errors,
+            "age_ms": (time.monotonic() - state.timestamp) * 1000 if state else None,
+            "read": self.read_time.summary(),
+        }
@@ -0,0 +1,92 @@
+"""Detection-rate scheduler for the vision loop."""
+
+import threading
+import time
+
+
+class RateScheduler:
+    """Pick how often to run detection from what the elf has seen recently.
+
+    * ``fast_interval`` while a face is visible, for ``cooldown`` seconds
+      after it is lost, and after anyone calls :meth:`boost`.
+    * ``normal_interval`` once the cool-down has passed.
+    * ``slow_interval`` when no face has been seen for ``idle_after`` seconds.
+
+    Frames are paced against deadlines rather than fixed sleeps, so the time
+    spent processing a frame is not added on top of the interval.
+    """
+
+    def __init__(self, fast_interval=0.05, normal_interval=0.1, slow_interval=0.5,
+                 cooldown=5.0, idle_after=60.0):
+        self.fast_interval = fast_interval
+        self.normal_interval = normal_interval
+        self.slow_interval = slow_interval
+        self.cooldown = cooldown
+        self.idle_after = idle_after
+        self.face_present = False
+        self._last_face_time = time.monotonic()
+        self._boost_until = 0.0
+        self._tick = time.monotonic()
+        self._wake = threading.Event()
+        self._interrupted = False
+
+    def update(self, face_present, now=None):
+        """Tell the scheduler whether the latest frame contained a face."""
+        if now is None:
+            now = time.monotonic()
+        if face_present and not self.face_present:
+            # Cut any slow sleep short so tracking starts straight away
+            self._wake.set()
+        if face_present or self.face_present:
+            self._last_face_time = now
+        self.face_present = face_present
+
+    def boost(self, duration=None):
+        """Run at the maximum rate now and for ``duration`` (default: cooldown) seconds."""
+        until = time.monotonic() + (self.cooldown if duration is None else duration)
+        self._boost_until = max(self._boost_until, until)
+        self._wake.set()
+
+    def wake(self):
+        """Interrupt the current wait (e.g. on shutdown)."""
+        self._interrupted = True
+        self._wake.set()
+
+    def interval(self, now=None):
+        """Return the detection interval that applies right now."""
+        if now is None:
+            now = time.monotonic()
+        since_face = now - self._last_face_time
+        if self.face_present or now < self._boost_until or since_face < self.cooldown:
+            return self.fast_interval
+        if since_face < self.idle_after:
+            return self.normal_interval
+        return self.slow_interval
+
+    def wait(self):
+        """Sleep until the next frame is due. Returns the interval used.
+
+        A wake-up from :meth:`update` or :meth:`boost` only cuts the wait
+        short if it made the interval shorter; :meth:`wake` always does.
+        Wake-ups set by the vision thread itself before calling this are
+        already reflected in the interval, so they are cleared here.
+        """
+        self._wake.clear()
+        while True:
+            now = time.monotonic()
+            interval = self.interval(now)
+            deadline = self._tick + interval
+            if deadline <= now or self._interrupted:
+                break
+            self._wake.wait(deadline - now)
+            self._wake.clear()
+            # Loop: the rate may have changed, or the deadline has passed
+        self._interrupted = False
+        now = time.monotonic()
+        # Keep the cadence, but never try to catch up on missed frames and
+        # never schedule from a point later than now
+        if now < deadline or now - deadline >= interval:
+            self._tick = now
+        else:
+            self._tick = deadline
+        return interval
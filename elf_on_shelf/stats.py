@@ -0,0 +1,90 @@
+"""Low-overhead latency histograms for always-on instrumentation."""
+
+import math
+
+# Log-spaced bins from 10 us to ~100 s, 20 bins per decade (~12% wide)
+_MIN_SECONDS = 1e-5
+_BINS_PER_DECADE = 20
+_DECADES = 7
+_NUM_BINS = _BINS_PER_DECADE * _DECADES + 2  # + underflow and overflow
+
+
+def _bin_upper(index):
+    """Upper edge, in seconds, of a histogram bin."""
+    if index == 0:
+        return _MIN_SECONDS
+    return _MIN_SECONDS * 10 ** (index / _BINS_PER_DECADE)
+
+
+class LatencyHistogram:
+    """Fixed-bin histogram of durations.
+
+    Meant to have a single writer (the thread doing the work). Recording is
+    one ``log10`` and a list increment, with no lock; readers may see a
+    sample or two in flight, which is fine for percentiles.
+    """
+
+    def __init__(self):
+        self.counts = [0] * _NUM_BINS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        if seconds <= _MIN_SECONDS:
+            index = 0
+        else:
+            index = min(_NUM_BINS - 1, 1 + int(math.log10(seconds / _MIN_SECONDS) * _BINS_PER_DECADE))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Return the q-th percentile (0-100) in seconds, as a bin upper edge."""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return 0.0
+        target = total * q / 100.0
+        running = 0
+        for index, n in enumerate(counts):
+            running += n
+            if running >= target:
+                return min(_bin_upper(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Return count, mean and p50/p95/p99/max in milliseconds."""
+        count = self.count
+        return {
+            "count": count,
+            "mean_ms": self.total / count * 1000 if count else 0.0,
+            "p50_ms": self.percentile(50) * 1000,
+            "p95_ms": self.percentile(95) * 1000,
+            "p99_ms": self.percentile(99) * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+    def reset(self):
+        self.counts = [0] * _NUM_BINS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class StageTimer:
+    """A set of named histograms, one per pipeline stage."""
+
+    def __init__(self, *stages):
+        self.stages = {name: LatencyHistogram() for name in stages}
+
+    def record(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def summary(self):
+        return {name: h.summary() for name, h in self.stages.items()}
@@ -0,0 +1,207 @@
+"""Offline parameter sweep for the Haar face detector.
+
+Evaluates a grid of detector settings and detection widths on a directory
+of labeled frames, across a process pool, and reports the Pareto front of
+CPU cost per frame against precision and recall:
+
+    python -m elf_on_shelf.sweep captures/ --out sweep_report.md
+
+The directory holds image files plus a ``labels.csv`` with columns
+``filename,face`` (1 if a face is present, else 0).
+
+The detector never runs below ``frame width * CASCADE_WINDOW / min face size`` (so the
+smallest face still fills the cascade window), so each configuration is
+first mapped to the width it would actually run at on the widest frame;
+configurations that end up identical are evaluated once.
+"""
+
+import argparse
+import csv
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+DEFAULT_GRID = {
+    "scale_factor": [1.05, 1.1, 1.2, 1.3],
+    "min_neighbors": [3, 5, 8, 10],
+    "min_face_size": [40, 60, 80],
+    "detection_width": [160, 240, 320, 480, 0],  # 0 = full resolution
+}
+
+# Frames, labels and the parsed cascade are loaded once per worker process
+_frames = None
+_labels = None
+_detector = None
+
+
+def load_labeled_frames(directory):
+    """Return ([gray frames], [bool labels]) for every labeled image."""
+    import cv2
+
+    directory = Path(directory)
+    with open(directory / "labels.csv", newline="") as f:
+        labels = {row["filename"]: row["face"].strip() == "1" for row in csv.DictReader(f)}
+    frames, truth = [], []
+    for path in sorted(directory.iterdir()):
+        if path.suffix.lower() not in IMAGE_SUFFIXES or path.name not in labels:
+            continue
+        image = cv2.imread(str(path), cv2.IMREAD_GRAYSCALE)
+        if image is not None:
+            frames.append(image)
+            truth.append(labels[path.name])
+    return frames, truth
+
+
+def _init_worker(directory):
+    global _frames, _labels, _detector
+    import cv2
+    from .detectors import HaarDetector
+
+    # One core per worker, so CPU time per frame matches the robot's single-thread cost
+    cv2.setNumThreads(1)
+    _frames, _labels = load_labeled_frames(directory)
+    _detector = HaarDetector()
+    _detector.load()
+
+
+def effective_configs(configs, frame_width):
+    """Map each config's detection_width to the one that actually runs; drop duplicates.
+
+    Returns (configs, merged) where merged counts configurations that
+    turned out identical to an earlier one.
+    """
+    from .detectors import HaarDetector
+
+    unique = []
+    for config in configs:
+        detector = HaarDetector(detection_width=config["detection_width"] or None,
+                                min_face_size=(config["min_face_size"],) * 2)
+        width = detector.effective_width(frame_width)
+        config = {**config, "detection_width": 0 if width >= frame_width else width}
+        if config not in unique:
+            unique.append(config)
+    return unique, len(configs) - len(unique)
+
+
+def evaluate(params):
+    """Run one configuration over every frame; returns a result row."""
+    detector = _detector
+    detector.detection_width = params["detection_width"] or None
+    detector.scale_factor = params["scale_factor"]
+    detector.min_neighbors = params["min_neighbors"]
+    detector.min_face_size = (params["min_face_size"],) * 2
+    tp = fp = fn = 0
+    cpu_start = time.process_time()
+    for gray, has_face in zip(_frames, _labels):
+        boxes, _ = detector.detect(gray)
+        found = len(boxes) > 0
+        tp += found and has_face
+        fp += found and not has_face
+        fn += has_face and not found
+    cpu = time.process_time() - cpu_start
+    return {
+        **params,
+        "cpu_ms": cpu / len(_frames) * 1000,
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        "false_positives": fp,
+    }
+
+
+def pareto_front(rows):
+    """Rows not beaten on all of: lower CPU, higher precision, higher recall."""
+    def dominates(a, b):
+        no_worse = (a["cpu_ms"] <= b["cpu_ms"] and a["precision"] >= b["precision"]
+                    and a["recall"] >= b["recall"])
+        better = (a["cpu_ms"] < b["cpu_ms"] or a["precision"] > b["precision"]
+                  or a["recall"] > b["recall"])
+        return no_worse and better
+
+    return sorted((r for r in rows if not any(dominates(o, r) for o in rows)),
+                  key=lambda r: r["cpu_ms"])
+
+
+def _format_row(row, baseline_cpu):
+    width = row["detection_width"] or "full"
+    return (f"| {row['scale_factor']} | {row['min_neighbors']} | {row['min_face_size']} "
+            f"| {width} | {row['cpu_ms']:.2f} | {row['cpu_ms'] / baseline_cpu:.0%} "
+            f"| {row['precision']:.3f} | {row['recall']:.3f} | {row['false_positives']} |")
+
+
+def write_report(rows, baseline, path, frame_count, frame_width, merged):
+    from .detectors import CASCADE_WINDOW
+
+    header = ("| scaleFactor | minNeighbors | minSize | width | CPU ms/frame | vs current "
+              "| precision | recall | false + |\n|---|---|---|---|---|---|---|---|---|")
+    lines = [
+        "# Face detector sweep",
+        "",
+        f"{frame_count} labeled frames, {len(rows)} configurations.",
+        "",
+        f"Widths are the ones the detector actually runs at on {frame_width}-px frames. "
+        f"It raises any width below {frame_width} x {CASCADE_WINDOW} / minSize, so {merged} grid "
+        f"configurations that collapsed onto another one were not run again.",
+        "",
+        "## Current settings",
+        "",
+        header,
+        _format_row(baseline, baseline["cpu_ms"]),
+        "",
+        "## Pareto front (CPU vs precision vs recall)",
+        "",
+        header,
+    ]
+    lines += [_format_row(row, baseline["cpu_ms"]) for row in pareto_front(rows)]
+    Path(path).write_text("\n".join(lines) + "\n")
+
+
+def main():
+    from .detectors import DEFAULT_DETECTION_WIDTH, MIN_FACE_SIZE, MIN_NEIGHBORS, SCALE_FACTOR
+
+    parser = argparse.ArgumentParser(description="Sweep face detector settings on labeled frames.")
+    parser.add_argument("frames", help="Directory of frames with labels.csv")
+    parser.add_argument("--out", default="sweep_report.md", help="Markdown report to write")
+    parser.add_argument("--csv", help="Also write every result row to this CSV file")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    baseline = {
+        "scale_factor": SCALE_FACTOR,
+        "min_neighbors": MIN_NEIGHBORS,
+        "min_face_size": MIN_FACE_SIZE[0],
+        "detection_width": DEFAULT_DETECTION_WIDTH,
+    }
+    grid = [dict(zip(DEFAULT_GRID, values)) for values in itertools.product(*DEFAULT_GRID.values())]
+
+    frames = load_labeled_frames(args.frames)[0]
+    frame_count = len(frames)
+    frame_width = max(frame.shape[1] for frame in frames)
+    grid, merged = effective_configs(grid, frame_width)
+    baseline = effective_configs([baseline], frame_width)[0][0]
+    if baseline not in grid:
+        grid.append(baseline)
+    del frames
+    print(f"[Sweep] {len(grid)} configurations ({merged} duplicates at {frame_width} px dropped) "
+          f"x {frame_count} frames on {args.workers} workers")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker,
+                             initargs=(args.frames,)) as pool:
+        rows = list(pool.map(evaluate, grid))
+    print(f"[Sweep] Done in {time.perf_counter() - start:.1f}s")
+
+    baseline_row = next(r for r in rows if all(r[k] == v for k, v in baseline.items()))
+    write_report(rows, baseline_row, args.out, frame_count, frame_width, merged)
+    print(f"[Sweep] Report written to {args.out}")
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Cheap face tracker used between full cascade detections."""
+
+import cv2
+import numpy as np
+
+
+class FaceTracker:
+    """Follow known face boxes between detections with template matching.
+
+    Each face is stored as a small template. On every frame only a window
+    around the previous box is searched, resized so the template is
+    ``template_size`` pixels wide, which keeps the cost a tiny fraction of a
+    full cascade scan regardless of the face size.
+    """
+
+    def __init__(self, min_confidence=0.6, search_margin=0.5, template_size=32):
+        # Normalised correlation below this means the track is lost
+        self.min_confidence = min_confidence
+        # Search window padding around the previous box, in box widths
+        self.search_margin = search_margin
+        self.template_size = template_size
+        self.confidence = 0.0
+        # (N, 4) int32 boxes, updated in place by update()
+        self._boxes = np.empty((0, 4), dtype=np.int32)
+        self._templates = []
+        # Per-track search region and score map, reused while their size holds
+        self._regions = []
+        self._scores = []
+
+    @property
+    def active(self):
+        """Return whether there are faces being tracked."""
+        return len(self._boxes) > 0
+
+    def reset(self, gray, boxes):
+        """Start tracking the given (x, y, w, h) boxes in a grayscale frame."""
+        kept = []
+        self._templates = []
+        for x, y, w, h in boxes:
+            scale = self.template_size / w
+            patch = gray[y:y + h, x:x + w]
+            if patch.size == 0:
+                continue
+            size = (self.template_size, max(1, round(h * scale)))
+            self._templates.append(cv2.resize(patch, size, interpolation=cv2.INTER_AREA))
+            kept.append((x, y, w, h))
+        self._boxes = np.array(kept, dtype=np.int32).reshape(-1, 4)
+        self._regions = [None] * len(kept)
+        self._scores = [None] * len(kept)
+        self.confidence = 1.0 if kept else 0.0
+
+    def clear(self):
+        """Drop all tracks."""
+        self._boxes = self._boxes[:0]
+        self._templates = []
+        self._regions = []
+        self._scores = []
+        self.confidence = 0.0
+
+    def update(self, gray):
+        """Track every face into a new frame.
+
+        Returns ``(boxes, confidence)`` where confidence is the weakest match
+        score across the tracked faces. Tracks are kept even when the score is
+        low; the caller decides whether to fall back to a full detection.
+        The returned ``(N, 4)`` array is the tracker's own and is overwritten
+        by the next update.
+        """
+        frame_h, frame_w = gray.shape[:2]
+        confidence = 1.0
+        for i, template in enumerate(self._templates):
+            x, y, w, h = (int(v) for v in self._boxes[i])
+            pad_x = round(w * self.search_margin)
+            pad_y = round(h * self.search_margin)
+            x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+            x1, y1 = min(frame_w, x + w + pad_x), min(frame_h, y + h + pad_y)
+            scale = self.template_size / w
+            region_w = round((x1 - x0) * scale)
+            region_h = round((y1 - y0) * scale)
+            if region_w < template.shape[1] or region_h < template.shape[0]:
+                # Face has drifted off the edge of the frame
+                confidence = 0.0
+                continue
+            region = self._regions[i]
+            if region is None or region.shape != (region_h, region_w):
+                region = self._regions[i] = np.empty((region_h, region_w), dtype=np.uint8)
+                self._scores[i] = None
+            cv2.resize(gray[y0:y1, x0:x1], (region_w, region_h), dst=region,
+                       interpolation=cv2.INTER_AREA)
+            scores = self._scores[i] = cv2.matchTemplate(
+                region, template, cv2.TM_CCOEFF_NORMED, result=self._scores[i])
+            _, best, _, (best_x, best_y) = cv2.minMaxLoc(scores)
+            confidence = min(confidence, best)
+            self._boxes[i, 0] = x0 + round(best_x / scale)
+            self._boxes[i, 1] = y0 + round(best_y / scale)
+        self.confidence = confidence if len(self._boxes) else 0.0
+        return self._boxes, self.confidence
@@ -1,48 +1,142 @@
 """Vision system that uses Reachy Mini's built-in camera for face detection."""
 
+import importlib.util
+import queue
 import threading
 import time
+from collections import namedtuple
 
-# Try to import OpenCV for face detection
-try:
-    import cv2
-    import os
-    from pathlib import Path
-    
-    def find_asset(filename):
-        candidates = [
-            Path(__file__).parent / "assets" / filename,
-            Path(os.getcwd()) / "elf_on_shelf" / "assets" / filename,
-            Path(os.getcwd()) / "assets" / filename,
-            Path(__file__).parent.parent / "elf_on_shelf" / "assets" / filename,
-        ]
-        for cand in candidates:
-            if cand.exists():
-                return str(cand)
-        
-        # Fallback to system default
-        return cv2.data.haarcascades + filename
-
-    cascade_path = find_asset('haarcascade_frontalface_default.xml')
-    print(f"[Vision] Loading cascade from: {cascade_path}")
-    
-    FACE_CASCADE = cv2.CascadeClassifier(cascade_path)
-    if FACE_CASCADE.empty():
-        raise ValueError('Failed to load Haar cascade')
-    HAS_OPENCV = True
-except Exception as e:
-    HAS_OPENCV = False
-    FACE_CASCADE = None
-    print(f"Warning: OpenCV not available. Face detection disabled. Error: {e}")
+import numpy as np
+
+from .frame_bus import FrameBus
+from .scheduler import RateScheduler
+from .stats import StageTimer
+
+# Clear the face state if the camera delivers nothing for this long
+FRAME_TIMEOUT = 1.0
+
+# Face events; timestamp is the monotonic capture time of the frame that caused it
+FACE_APPEARED = "appeared"
+FACE_LOST = "lost"
+# Early warning, before any face is confirmed: something moved through part
+# of the view (a person walking in). faces is always empty.
+MOTION_ALERT = "motion"
+FaceEvent = namedtuple("FaceEvent", ["kind", "timestamp", "faces"])
+
+# A motion alert needs at least this share of the gate thumbnail to change,
+# confined to at most this share of its regions: when changes are spread
+# over the whole view it is the elf's own head moving, not a visitor.
+ALERT_MIN_FRACTION = 0.03
+ALERT_MAX_SPREAD = 0.5
+# Minimum time between motion alerts, in seconds of frame time
+ALERT_INTERVAL = 0.3
+
+# OpenCV and the detector modules are imported on first VisionSystem
+# construction, so importing this module (e.g. during app discovery) is cheap.
+HAS_OPENCV = importlib.util.find_spec("cv2") is not None
+DEFAULT_DETECTION_WIDTH = 320  # Same as detectors.DEFAULT_DETECTION_WIDTH
+cv2 = None
+create_detector = None
+FaceTracker = None
+MotionGate = None
+OPENCV_IMPORT_TIME = None
+
+
+def _import_opencv():
+    """Import OpenCV-backed helpers once; returns whether they are available."""
+    global cv2, create_detector, FaceTracker, MotionGate, HAS_OPENCV, OPENCV_IMPORT_TIME
+    if OPENCV_IMPORT_TIME is not None or not HAS_OPENCV:
+        return HAS_OPENCV
+    start = time.perf_counter()
+    try:
+        import cv2
+        from .detectors import create_detector
+        from .gating import MotionGate
+        from .tracking import FaceTracker
+    except Exception as e:
+        HAS_OPENCV = False
+        print(f"Warning: OpenCV not available. Face detection disabled. Error: {e}")
+    OPENCV_IMPORT_TIME = time.perf_counter() - start
+    return HAS_OPENCV
 
 
 class VisionSystem:
     """Vision system using Reachy Mini's camera for face detection."""
 
-    def __init__(self, reachy_mini=None):
+    def __init__(self, reachy_mini=None, detection_width=DEFAULT_DETECTION_WIDTH,
+                 tracking=True, redetect_interval=10, gating=True, frame_bus=None,
+                 detector="haar", detector_backend="thread", detector_workers=2,
+                 history_size=600, scheduler=None, input_mode="auto", motion_alerts=True):
         self.reachy_mini = reachy_mini
+        _import_opencv()
+        # Startup costs in milliseconds, filled in as they are paid
+        self.timings = {"opencv_import_ms": (OPENCV_IMPORT_TIME or 0.0) * 1000}
+        self._start_time = None
+        # Shared capture thread; one is created (and owned) if not supplied
+        self.frame_bus = frame_bus
+        self._owns_bus = False
+        self._frames = None
+        self._closed_dropped = 0
+        # Width frames are downscaled to for detection (None = full frame)
+        self.detection_width = detection_width
+        # Frame layout: "bgr", "nv12"/"i420" (planar 4:2:0, Y plane used
+        # directly), or "auto" (single-channel frames used as-is, else BGR)
+        self.input_mode = input_mode
+        self._gray_buf = None
+        # Face detector backend, by name (see detectors.DETECTORS)
+        self.detector_name = detector
+        self.detector = None
+        if HAS_OPENCV:
+            try:
+                self.detector = create_detector(detector, detection_width=detection_width)
+            except Exception as e:
+                print(f"[Vision] Could not load face detector: {e}")
+        # Between full detections, follow faces with a cheap tracker and
+        # re-run the cascade every `redetect_interval` frames or when the
+        # tracker loses confidence.
+        self.tracking = tracking and FaceTracker is not None
+        self.redetect_interval = redetect_interval
+        self._tracker = FaceTracker() if self.tracking else None
+        self._frames_since_detect = 0
+        # Skip detection entirely while the scene is static
+        self._gate = MotionGate() if gating and MotionGate is not None else None
+        # Emit MOTION_ALERT events from the gate's frame difference
+        self.motion_alerts = motion_alerts and self._gate is not None
+        self.motion_alerts_sent = 0
+        # Alerts skipped because the robot was moving its own head (and so the camera)
+        self.motion_alerts_suppressed = 0
+        # Optional callable(timestamp) -> bool, True while the robot moves its head
+        self.ego_motion = None
+        self._last_alert = float("-inf")
+        # "thread" detects in the vision thread, "process" in a worker pool
+        self.detector_backend = detector_backend
+        self.detector_workers = detector_workers
+        self._pool = None
+        # The pool's latency report, kept when it shuts down
+        self._pool_latency = None
+        self.cascade_runs = 0
+        self.tracked_frames = 0
+        # Detection rate: slow when the room has been empty for a while,
+        # fast while someone is (or was just) there
+        self.scheduler = scheduler or RateScheduler()
+        # Per-stage timings of the vision thread, always on
+        self.timer = StageTimer("wait", "gate", "convert", "track", "detect", "publish")
+        self.frames_processed = 0
+        self._frame_interval = 0.0
+        self._last_frame_time = None
         self.running = False
         self.face_detected = False
+        # Latest boxes live in a buffer that is overwritten in place each
+        # frame; face_boxes is an (N, 4) view of it. Copy it (or use
+        # get_faces) to keep a result.
+        self._face_buf = np.zeros((4, 4), dtype=np.int32)
+        self.face_boxes = self._face_buf[:0]
+        self.frame_timestamp = 0.0
+        # Rolling per-frame results (~30 s at 20 FPS) for cheap queries
+        from .history import DetectionHistory
+        self.history = DetectionHistory(history_size)
+        self._listeners = []
+        self._event_queues = []
         self._thread = None
         self._lock = threading.Lock()
 
@@ -51,14 +145,25 @@ class VisionSystem:
         if self.running:
             return
         self.running = True
+        self._start_time = time.perf_counter()
         self._thread = threading.Thread(target=self._loop, daemon=True)
         self._thread.start()
 
     def stop(self):
         """Stop the vision processing loop."""
         self.running = False
+        self.scheduler.wake()
         if self._thread:
             self._thread.join(timeout=2.0)
+        if self._frames is not None:
+            # Keep the subscriber's drop count for the shutdown report
+            self._closed_dropped += self._frames.dropped
+            self._frames.close()
+            self._frames = None
+        if self._owns_bus:
+            self.frame_bus.stop()
+            self.frame_bus = None
+            self._owns_bus = False
 
     def _loop(self):
         """Main vision processing loop."""
@@ -74,66 +179,354 @@ class VisionSystem:
         
         print(f"[Vision] OpenCV available: {HAS_OPENCV}")
         
+        # Load the detector here, off the caller's thread, before any frame
+        if self.detector is not None:
+            try:
+                self.detector.load()
+                self.timings["detector_load_ms"] = self.detector.load_time * 1000
+            except Exception as e:
+                print(f"[Vision] Could not load face detector: {e}")
+                self.detector = None
+
         # Can we try to get frames?
         can_try_camera = (
             self.reachy_mini is not None 
             and self.reachy_mini.media is not None 
-            and HAS_OPENCV
+            and self.detector is not None
         )
         
         if can_try_camera:
-            print("[Vision] Will attempt face detection via get_frame()")
+            print("[Vision] Will attempt face detection via the frame bus")
+            if self.frame_bus is None:
+                self.frame_bus = FrameBus(self.reachy_mini.media)
+                self._owns_bus = True
+            self.frame_bus.start()
+            self._frames = self.frame_bus.subscribe("vision")
+            if self.detector_backend == "process":
+                self._start_pool()
         else:
             print("[Vision] Running in mock mode - face_detected always False")
         
         while self.running:
             if can_try_camera:
                 try:
-                    frame = self.reachy_mini.media.get_frame()
+                    # Always process the newest frame; stale ones are dropped
+                    started = time.perf_counter()
+                    frame = self._frames.wait(timeout=FRAME_TIMEOUT)
+                    self.timer.record("wait", time.perf_counter() - started)
                     
-                    if frame is not None:
-                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                        faces = FACE_CASCADE.detectMultiScale(
-                            gray,
-                            scaleFactor=1.1,
-                            minNeighbors=8,  # Increased from 5 to reduce false positives
-                            minSize=(60, 60) # Increased from 30x30 to avoid noise
-                        )
-                        with self._lock:
-                            self.face_detected = len(faces) > 0
+                    if self._pool is not None and self._pool.failed:
+                        print("[Vision] Detection pool failed - falling back to in-thread")
+                        self._stop_pool()
+
+                    if frame is not None and self._pool is not None:
+                        self._submit_to_pool(frame)
+                    elif frame is not None:
+                        self.process_frame(frame.image, frame.timestamp)
+                        if "first_frame_ms" not in self.timings:
+                            self.timings["first_frame_ms"] = (time.perf_counter() - self._start_time) * 1000
+                            print(f"[Vision] Startup timings: {self.timings}")
                     else:
-                        with self._lock:
-                            self.face_detected = False
+                        self._set_faces((), time.monotonic())
+                    if frame is not None:
+                        self._count_frame()
+
+                    # Pace to the rate the scheduler picks for the current state.
+                    # At the fast rate the pool takes every frame the bus
+                    # captures, so waiting for the next frame is the pacing.
+                    scheduler = self.scheduler
+                    if self._pool is None or scheduler.interval() > scheduler.fast_interval:
+                        scheduler.wait()
                             
                 except Exception as e:
                     print(f"[Vision] Error: {e}")
-                    with self._lock:
-                        self.face_detected = False
-                
-                time.sleep(0.05)  # ~20 FPS
+                    if self._tracker is not None:
+                        self._tracker.clear()
+                    if self._gate is not None:
+                        self._gate.reset()
+                    self._set_faces((), time.monotonic())
+                    time.sleep(0.05)
             else:
-                with self._lock:
-                    self.face_detected = False
+                self._set_faces((), time.monotonic())
                 time.sleep(0.5)
+        self._stop_pool()
+
+    def _start_pool(self):
+        try:
+            from .detect_pool import ProcessPoolDetector
+            self._pool = ProcessPoolDetector(
+                self._set_faces,
+                workers=self.detector_workers,
+                detector=self.detector.name,
+                detection_width=self.detection_width,
+            )
+            self._pool.start()
+            print(f"[Vision] Detecting in {self.detector_workers} worker processes")
+        except Exception as e:
+            print(f"[Vision] Could not start detection pool, detecting in-thread: {e}")
+            self._pool = None
+
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._pool_latency = self._pool.latency_report()
+            self._pool.close()
+            self._pool = None
+
+    def _submit_to_pool(self, frame):
+        """Hand a frame to the worker pool; results arrive via _set_faces."""
+        gray = self._gated_gray(frame.image, frame.timestamp)
+        if gray is not None:
+            self._pool.submit(gray, frame.timestamp)
+
+    def _set_faces(self, faces, timestamp):
+        """Publish the latest result and notify listeners on appear/lost."""
+        count = len(faces)
+        detected = count > 0
+        self.history.append(timestamp, time.monotonic() - timestamp, faces)
+        self.scheduler.update(detected)
+        with self._lock:
+            changed = detected != self.face_detected
+            self.face_detected = detected
+            if faces is not self.face_boxes:
+                if count > len(self._face_buf):
+                    self._face_buf = np.zeros((count, 4), dtype=np.int32)
+                    self.face_boxes = self._face_buf[:0]
+                if count:
+                    self._face_buf[:count] = faces
+                if count != len(self.face_boxes):
+                    self.face_boxes = self._face_buf[:count]
+            self.frame_timestamp = timestamp
+            if changed:
+                # Events outlive this frame, so they get their own copy
+                event = FaceEvent(FACE_APPEARED if detected else FACE_LOST, timestamp,
+                                  self.face_boxes.copy())
+        if changed:
+            self._emit(event)
+
+    def _emit(self, event):
+        for callback in list(self._listeners):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[Vision] Listener error: {e}")
+        for events in list(self._event_queues):
+            try:
+                events.put_nowait(event)
+            except queue.Full:
+                # Reader is not keeping up: drop its oldest event
+                try:
+                    events.get_nowait()
+                except queue.Empty:
+                    pass
+                events.put_nowait(event)
+
+    def add_listener(self, callback):
+        """Call ``callback(event)`` from the vision thread on every FaceEvent.
+
+        Callbacks run inline with detection, so they must return quickly.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def event_queue(self, maxsize=64):
+        """Return a queue that receives every FaceEvent, for blocking readers."""
+        events = queue.Queue(maxsize=maxsize)
+        self._event_queues.append(events)
+        return events
+
+    def process_frame(self, image, timestamp=None):
+        """Run detection on one frame synchronously and publish the result.
+
+        The vision thread calls this for every frame it takes from the bus;
+        offline tools (e.g. replaying a recording) can call it directly to
+        push every frame through the same path deterministically. The
+        returned boxes are overwritten by the next frame; copy them to keep.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        faces = self._process_frame(image, timestamp)
+        started = time.perf_counter()
+        self._set_faces(faces, timestamp)
+        self.timer.record("publish", time.perf_counter() - started)
+        return faces
+
+    def _luma_view(self, image):
+        """Return a zero-copy grayscale view of a planar frame, or None for BGR."""
+        if self.input_mode in ("nv12", "i420"):
+            # Y plane is the first 2/3 of the rows of a planar 4:2:0 frame
+            return image[:image.shape[0] * 2 // 3]
+        if self.input_mode == "auto" and image.ndim == 2:
+            return image
+        return None
+
+    def _to_gray(self, image):
+        """Convert a BGR frame into the reused grayscale buffer."""
+        if self._gray_buf is None or self._gray_buf.shape != image.shape[:2]:
+            self._gray_buf = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            return self._gray_buf
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+
+    def _gated_gray(self, image, timestamp):
+        """Return the grayscale frame to detect on, or None if the gate skips it."""
+        started = time.perf_counter()
+        luma = self._luma_view(image)
+        if self._gate is not None:
+            # Gate on frame time so replays behave the same at any speed
+            passed = self._gate.should_detect(image if luma is None else luma, timestamp)
+            self.timer.record("gate", time.perf_counter() - started)
+            if self.motion_alerts:
+                self._check_motion_alert(timestamp)
+            if not passed:
+                return None
+            if self._gate.motion >= self._gate.threshold:
+                self.scheduler.boost()
+        if luma is not None:
+            return luma
+        started = time.perf_counter()
+        gray = self._to_gray(image)
+        self.timer.record("convert", time.perf_counter() - started)
+        return gray
+
+    def _check_motion_alert(self, timestamp):
+        """Emit MOTION_ALERT when part of the view, but not all of it, changes.
+
+        Nothing is emitted while ``ego_motion`` says the robot is moving its
+        own head, since the view then shifts without anyone coming in.
+        """
+        gate = self._gate
+        if (gate.changed_fraction >= ALERT_MIN_FRACTION
+                and gate.changed_spread <= ALERT_MAX_SPREAD
+                and not self.face_detected
+                and timestamp - self._last_alert >= ALERT_INTERVAL):
+            ego_motion = self.ego_motion
+            if ego_motion is not None and ego_motion(timestamp):
+                self.motion_alerts_suppressed += 1
+                return
+            self._last_alert = timestamp
+            self.motion_alerts_sent += 1
+            self._emit(FaceEvent(MOTION_ALERT, timestamp, ()))
+
+    def _count_frame(self):
+        """Update the processed-frame count and the smoothed frame interval."""
+        now = time.monotonic()
+        if self._last_frame_time is not None:
+            interval = now - self._last_frame_time
+            self._frame_interval = (interval if not self._frame_interval
+                                    else 0.9 * self._frame_interval + 0.1 * interval)
+        self._last_frame_time = now
+        self.frames_processed += 1
+
+    def _process_frame(self, frame, timestamp):
+        """Return the face boxes for a camera frame, tracking when possible."""
+        gray = self._gated_gray(frame, timestamp)
+        if gray is None:
+            # Nothing changed - reuse the last result
+            return self.face_boxes
+
+        started = time.perf_counter()
+        if (self._tracker is not None and self._tracker.active
+                and self._frames_since_detect < self.redetect_interval):
+            boxes, confidence = self._tracker.update(gray)
+            if confidence >= self._tracker.min_confidence:
+                self._frames_since_detect += 1
+                self.tracked_frames += 1
+                self.timer.record("track", time.perf_counter() - started)
+                return boxes
+
+        faces, _ = self.detector.detect(gray)
+        self.cascade_runs += 1
+        self._frames_since_detect = 0
+        if self._tracker is not None:
+            self._tracker.reset(gray, faces)
+        self.timer.record("detect", time.perf_counter() - started)
+        return faces
+
+    def detection_counters(self):
+        """Return how many frames ran the cascade, were tracked, or were skipped."""
+        counters = {"cascade": self.cascade_runs, "tracked": self.tracked_frames,
+                    "motion_alerts": self.motion_alerts_sent,
+                    "motion_alerts_suppressed": self.motion_alerts_suppressed}
+        if self._pool is not None:
+            counters["pool"] = self._pool.counters()
+        if self._gate is not None:
+            counters["skipped_static"] = self._gate.skipped_static
+            counters["skipped_duplicate"] = self._gate.skipped_duplicate
+        return counters
+
+    def request_fast_rate(self, duration=None):
+        """Ask for maximum-rate detection now (e.g. when the main loop expects a face)."""
+        self.scheduler.boost(duration)
+
+    def detector_latency(self):
+        """Return the active detector's measured per-frame latency.
+
+        With the process backend that is the pool's, measured in the workers
+        (and kept after the pool stops), unless detection fell back in-thread.
+        """
+        pool = self._pool
+        if pool is not None:
+            return pool.latency_report()
+        if self.detector is None:
+            return None
+        if self._pool_latency is not None and not self.detector.frames:
+            return self._pool_latency
+        return self.detector.latency_report()
 
     def is_face_present(self):
         """Return whether a face is currently detected."""
         with self._lock:
             return self.face_detected
             
+    @property
+    def fps(self):
+        """Achieved processing rate, smoothed over the last few dozen frames."""
+        return 1.0 / self._frame_interval if self._frame_interval else 0.0
+
+    @property
+    def frames_dropped(self):
+        """Frames the bus dropped for this system, including past subscriptions."""
+        frames = self._frames
+        return self._closed_dropped + (frames.dropped if frames is not None else 0)
+
+    def stats(self):
+        """Return pipeline statistics: per-stage latency percentiles, FPS, drops."""
+        stats = {
+            "fps": self.fps,
+            "frames": self.frames_processed,
+            "dropped": self.frames_dropped,
+            "stages": self.timer.summary(),
+            "detections": self.detection_counters(),
+            "detector": self.detector_latency(),
+        }
+        if self.frame_bus is not None:
+            stats["grab"] = self.frame_bus.grab_time.summary()
+        return stats
+
     @property
     def status(self) -> str:
-        """Return current status."""
-        if not HAS_OPENCV:
+        """Return current status, with a one-line performance summary when running."""
+        if not HAS_OPENCV or self.detector is None:
             return 'no_opencv'
         if self.reachy_mini is None:
             return 'mock'
-        return 'ok'
+        if not self.frames_processed:
+            return 'ok'
+        detect = self.timer.stages["detect"].summary()
+        dropped = self.frames_dropped
+        return (f"ok ({self.fps:.1f} fps, detect p50/p95/p99 "
+                f"{detect['p50_ms']:.1f}/{detect['p95_ms']:.1f}/{detect['p99_ms']:.1f} ms, "
+                f"{dropped} dropped)")
 
     def get_faces(self):
-        """Return a list of detected faces."""
+        """Return the latest detected faces as ``{"bbox": [x, y, w, h]}`` dicts."""
         with self._lock:
-            if self.face_detected:
-                return [{"bbox": [0, 0, 1, 1]}]
-            return []
+            boxes = self.face_boxes.tolist()
+        return [{"bbox": box} for box in boxes]
+
+    def face_fraction(self, seconds=10.0):
+        """Fraction of recent frames (last ``seconds``) that contained a face."""
+        return self.history.face_fraction(seconds)
 
@@ -0,0 +1,111 @@
+"""Benchmark face detection throughput and recall at several detection widths.
+
+Feed it a directory of frames (e.g. saved with validate_camera.py) or a video:
+
+    python tests/bench_detection_width.py --frames captures/ --widths 160,240,320,480,full
+
+If the directory contains a ``labels.csv`` (``filename,face`` with face 0/1),
+recall is measured against the labels; otherwise the full-resolution
+detections are used as the reference. The detector never runs below the
+width that keeps minimum-size faces above the cascade window, so each row
+also shows the width it actually ran at.
+"""
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+import cv2
+
+from elf_on_shelf.detectors import HaarDetector
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+
+
+def load_frames(args):
+    """Return a list of (name, gray_frame) tuples."""
+    frames = []
+    if args.video:
+        cap = cv2.VideoCapture(args.video)
+        index = 0
+        while len(frames) < args.limit:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append((f"frame{index:05d}", cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)))
+            index += 1
+        cap.release()
+    else:
+        for path in sorted(Path(args.frames).iterdir()):
+            if path.suffix.lower() not in IMAGE_SUFFIXES:
+                continue
+            frame = cv2.imread(str(path))
+            if frame is not None:
+                frames.append((path.name, cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)))
+            if len(frames) >= args.limit:
+                break
+    return frames
+
+
+def load_labels(frames_dir):
+    labels_path = Path(frames_dir) / "labels.csv" if frames_dir else None
+    if labels_path is None or not labels_path.exists():
+        return None
+    with open(labels_path, newline="") as f:
+        return {row["filename"]: row["face"].strip() == "1" for row in csv.DictReader(f)}
+
+
+def run_width(frames, width, repeats):
+    """Return (fps, per-frame face presence, width actually run at) for one detection width."""
+    detector = HaarDetector(detection_width=width)
+    effective = detector.effective_width(frames[0][1].shape[1])
+    present = {}
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for name, gray in frames:
+            boxes, _ = detector.detect(gray)
+            present[name] = len(boxes) > 0
+    elapsed = time.perf_counter() - start
+    return len(frames) * repeats / elapsed, present, effective
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detection width vs FPS and recall.")
+    parser.add_argument("--frames", help="Directory of captured frames")
+    parser.add_argument("--video", help="Video file to read frames from")
+    parser.add_argument("--widths", default="160,240,320,480,640,full",
+                        help="Comma separated detection widths ('full' = no downscale)")
+    parser.add_argument("--limit", type=int, default=500, help="Maximum number of frames")
+    parser.add_argument("--repeats", type=int, default=1, help="Passes over the frames per width")
+    args = parser.parse_args()
+
+    if not args.frames and not args.video:
+        parser.error("one of --frames or --video is required")
+
+    frames = load_frames(args)
+    if not frames:
+        print("No frames found.")
+        sys.exit(1)
+    height, width = frames[0][1].shape[:2]
+    print(f"Loaded {len(frames)} frames ({width}x{height})")
+
+    reference = load_labels(args.frames)
+    if reference is None:
+        print("No labels.csv - using full-resolution detections as reference")
+        _, reference, _ = run_width(frames, None, 1)
+    positives = [name for name, face in reference.items() if face]
+
+    print(f"{'width':>8} {'runs at':>8} {'fps':>8} {'recall':>8} {'false+':>8}")
+    for entry in args.widths.split(","):
+        target = None if entry.strip() == "full" else int(entry)
+        fps, present, effective = run_width(frames, target, args.repeats)
+        hits = sum(1 for name in positives if present.get(name))
+        recall = hits / len(positives) if positives else float("nan")
+        false_pos = sum(1 for name, face in present.items() if face and not reference.get(name))
+        print(f"{entry.strip():>8} {effective:>8} {fps:8.1f} {recall:8.2%} {false_pos:8d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare per-frame cost of the grayscale paths used by the vision loop.
+
+    python tests/bench_luma.py --width 1280 --height 720 --frames 500
+
+Paths measured:
+  cvtColor       - new gray image allocated per frame (old behaviour)
+  cvtColor dst=  - conversion into a reused buffer (BGR input)
+  nv12 Y view    - zero-copy view of the luma plane (planar input)
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from elf_on_shelf.vision import VisionSystem
+
+
+def measure(name, convert, frames):
+    previous = convert(frames[0])  # warm up, allocate any reused buffers
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    allocated = 0
+    start = time.perf_counter()
+    for frame in frames:
+        gray = convert(frame)
+        # A result that is neither a view of the input nor the reused buffer is new memory
+        if not (np.may_share_memory(gray, frame) or np.may_share_memory(gray, previous)):
+            allocated += gray.nbytes
+        previous = gray
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    per_frame_us = elapsed / len(frames) * 1e6
+    print(f"{name:>16} {per_frame_us:10.1f} {allocated / len(frames) / 1024:12.1f} {(peak - before) / 1024:10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark BGR->gray vs zero-copy luma.")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bgr = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(4)]
+    nv12 = [cv2.cvtColor(f, cv2.COLOR_BGR2YUV_I420) for f in bgr]
+    bgr_frames = [bgr[i % 4] for i in range(args.frames)]
+    nv12_frames = [nv12[i % 4] for i in range(args.frames)]
+
+    vision_bgr = VisionSystem(gating=False, input_mode="bgr")
+    vision_nv12 = VisionSystem(gating=False, input_mode="nv12")
+
+    print(f"{args.width}x{args.height}, {args.frames} frames")
+    print(f"{'path':>16} {'us/frame':>10} {'KiB new/frm':>12} {'peak KiB':>10}")
+    measure("cvtColor", lambda f: cv2.cvtColor(f, cv2.COLOR_BGR2GRAY), bgr_frames)
+    measure("cvtColor dst=", vision_bgr._to_gray, bgr_frames)
+    measure("nv12 Y view", vision_nv12._luma_view, nv12_frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Estimate how much earlier motion alerts stop the elf than face detection.
+
+    python tests/bench_prefreeze.py session.elfrec
+
+Replays a recording through VisionSystem.process_frame and applies the same
+hold rule as RobotController.pre_freeze, in frame time: every motion alert
+starts (or extends) a PRE_FREEZE_HOLD hold. For each face that appears while
+a hold is running, the head start is the time from the start of the hold to
+the face being confirmed. Holds that expire without a face are false alarms.
+"""
+
+import argparse
+
+from elf_on_shelf.motion import PRE_FREEZE_HOLD
+from elf_on_shelf.recording import Recording
+from elf_on_shelf.stats import LatencyHistogram
+from elf_on_shelf.vision import FACE_APPEARED, MOTION_ALERT, VisionSystem
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure pre-freeze lead time on a recording.")
+    parser.add_argument("recording", help="File written by elf_on_shelf.recording")
+    parser.add_argument("--hold", type=float, default=PRE_FREEZE_HOLD, help="Hold length in seconds")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    vision = VisionSystem()
+    events = []
+    vision.add_listener(events.append)
+    for index in range(len(recording)):
+        vision.process_frame(recording[index], recording.timestamps[index])
+
+    start = recording.timestamps[0]
+    lead = LatencyHistogram()
+    hold_start = None
+    hold_until = float("-inf")
+    holds = false_alarms = faces = unwarned = 0
+    for event in events:
+        if hold_start is not None and event.timestamp >= hold_until:
+            false_alarms += 1
+            hold_start = None
+        if event.kind == MOTION_ALERT:
+            if hold_start is None:
+                holds += 1
+                hold_start = event.timestamp
+            hold_until = event.timestamp + args.hold
+        elif event.kind == FACE_APPEARED:
+            faces += 1
+            if hold_start is None:
+                unwarned += 1
+                print(f"  {event.timestamp - start:8.2f}s  face, no warning")
+            else:
+                lead.record(event.timestamp - hold_start)
+                print(f"  {event.timestamp - start:8.2f}s  face, stopped "
+                      f"{(event.timestamp - hold_start) * 1000:.0f} ms earlier")
+                hold_start = None
+    if hold_start is not None and recording.timestamps[-1] >= hold_until:
+        false_alarms += 1
+
+    summary = lead.summary()
+    print(f"{faces} faces appeared, {faces - unwarned} after a motion alert")
+    print(f"{holds} holds, {false_alarms} false alarms "
+          f"({false_alarms / max(1, holds):.0%} of holds)")
+    if summary["count"]:
+        print(f"Head start: mean {summary['mean_ms']:.0f} ms, p50 {summary['p50_ms']:.0f} ms, "
+              f"p95 {summary['p95_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
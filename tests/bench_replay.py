@@ -0,0 +1,113 @@
+"""Offline vision benchmark over a recorded camera session.
+
+    python tests/bench_replay.py session.elfrec
+    python tests/bench_replay.py session.elfrec --realtime --dump-faces faces/
+    python tests/bench_replay.py session.elfrec --detector-backend process --workers 3
+
+By default every frame is pushed through VisionSystem.process_frame as fast
+as possible, which is deterministic: the same recording and settings always
+give the same detections, so false positives from the field can be
+reproduced. --realtime instead runs the full threaded pipeline (frame bus,
+scheduler) against a ReplayRobot at the original frame timing.
+
+--detector-backend process also runs the threaded pipeline, detecting in a
+pool of worker processes. The frame bus feeds it every recorded frame at
+30 fps (or at the original timing with --realtime), with detection kept at
+the fast rate. The report shows whether the pool keeps up: the rate
+results came back at, and the frames dropped on the way.
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+
+from elf_on_shelf.recording import Recording, ReplayRobot
+from elf_on_shelf.vision import VisionSystem
+
+
+def run_offline(args, recording):
+    vision = VisionSystem(detector=args.detector, detection_width=args.width)
+    vision.detector.load()
+    hits = []
+    start = time.perf_counter()
+    for index in range(len(recording)):
+        faces = vision.process_frame(recording[index], recording.timestamps[index])
+        if len(faces):
+            hits.append((index, faces.copy()))
+    elapsed = time.perf_counter() - start
+    print(f"Processed {len(recording)} frames in {elapsed:.2f}s "
+          f"({len(recording) / elapsed:.1f} fps)")
+    return vision, hits
+
+
+def run_threaded(args, recording):
+    robot = ReplayRobot(recording, realtime=args.realtime)
+    vision = VisionSystem(reachy_mini=robot, detector=args.detector, detection_width=args.width,
+                          detector_backend=args.detector_backend, detector_workers=args.workers)
+    hits = []
+    vision.add_listener(lambda event: hits.append((event.kind, event.timestamp)))
+    if args.detector_backend == "process":
+        # Measure the sustained rate, as while someone is in view
+        vision.request_fast_rate(duration=float("inf"))
+    vision.start()
+    start = time.perf_counter()
+    while not robot.media.finished:
+        time.sleep(0.2)
+    elapsed = time.perf_counter() - start
+    pool = vision.detection_counters().get("pool")
+    vision.stop()
+    if pool is not None:
+        print(f"Pool of {args.workers}: {pool['completed']} frames in {elapsed:.2f}s "
+              f"({pool['completed'] / elapsed:.1f} fps), {pool['dropped']} dropped by the pool, "
+              f"{vision.frames_dropped} by the frame bus")
+    for kind, timestamp in hits:
+        print(f"  {timestamp - recording.timestamps[0]:8.2f}s  face {kind}")
+    return vision, []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark face detection on a recording.")
+    parser.add_argument("recording", help="File written by elf_on_shelf.recording")
+    parser.add_argument("--realtime", action="store_true", help="Replay at the original speed")
+    parser.add_argument("--detector", default="haar")
+    parser.add_argument("--detector-backend", choices=("thread", "process"), default="thread",
+                        help="Detect in the vision thread or in a worker pool")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes for the pool")
+    parser.add_argument("--width", type=int, default=320, help="Detection width")
+    parser.add_argument("--dump-faces", help="Directory to save frames with detections")
+    args = parser.parse_args()
+
+    recording = Recording(args.recording)
+    print(f"{len(recording)} frames, {recording.duration:.1f}s, shape {recording[0].shape}")
+
+    if args.realtime or args.detector_backend == "process":
+        vision, hits = run_threaded(args, recording)
+    else:
+        vision, hits = run_offline(args, recording)
+
+    stats = vision.stats()
+    print(f"Detections: {stats['detections']}")
+    for stage, summary in stats["stages"].items():
+        if summary["count"]:
+            print(f"  {stage:>8}: p50 {summary['p50_ms']:.2f} ms  p95 {summary['p95_ms']:.2f} ms  "
+                  f"p99 {summary['p99_ms']:.2f} ms  (n={summary['count']})")
+
+    if hits:
+        print(f"{len(hits)} frames with faces (index: boxes):")
+        for index, faces in hits[:50]:
+            print(f"  {index:6d}: {[list(map(int, box)) for box in faces]}")
+    if args.dump_faces and hits:
+        out = Path(args.dump_faces)
+        out.mkdir(parents=True, exist_ok=True)
+        for index, faces in hits:
+            image = recording[index].copy()
+            for x, y, w, h in faces:
+                cv2.rectangle(image, (int(x), int(y)), (int(x + w), int(y + h)), (0, 0, 255), 2)
+            cv2.imwrite(str(out / f"frame{index:06d}.jpg"), image)
+        print(f"Saved {len(hits)} frames to {out}")
+
+
+if __name__ == "__main__":
+    main()
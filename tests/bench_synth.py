@@ -0,0 +1,34 @@
+"""Render time of the procedural tunes against their playback length.
+
+    python tests/bench_synth.py --rate 16000 --repeat 5
+
+Each tune is rendered with every instrument, bypassing the clip cache;
+the realtime factor is clip length over render time (higher is better).
+"""
+
+import argparse
+import time
+
+from elf_on_shelf import synth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rate", type=int, default=16000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'tune':<14}{'instrument':<12}{'length s':>10}{'render ms':>11}{'realtime x':>12}")
+    for tune, (tempo, notes) in synth.TUNES.items():
+        for instrument in synth.INSTRUMENTS:
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                clip = synth._render(notes, tempo, 0, instrument, args.rate)
+                best = min(best, time.perf_counter() - start)
+            length = len(clip) / args.rate
+            print(f"{tune:<14}{instrument:<12}{length:>10.2f}{best * 1000:>11.1f}{length / best:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
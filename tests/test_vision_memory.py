@@ -0,0 +1,81 @@
+"""Check that the vision hot loop does not allocate per frame.
+
+Runs a few hundred small synthetic frames through
+VisionSystem.process_frame (no robot needed) and checks with tracemalloc
+that memory stays flat and that no frame-sized buffer is allocated once
+the loop has warmed up.
+
+    python -m pytest tests/test_vision_memory.py -q
+"""
+
+import gc
+import tracemalloc
+
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from elf_on_shelf.vision import VisionSystem  # noqa: E402
+
+# Small frames keep the cascade cheap; a per-frame allocation still shows
+# up as growth after a few hundred frames, and the 160-px detection width
+# still goes through the downscale path.
+WIDTH, HEIGHT = 320, 240
+DETECTION_WIDTH = 160
+WARMUP_FRAMES = 100
+FRAMES = 300
+# Memory still held after the run, and the most in use at any point in it.
+# A single 320x240 gray frame is 75 KiB, a downscaled 160x120 one 19 KiB.
+MAX_GROWTH = 8 * 1024
+MAX_PEAK = 16 * 1024
+
+
+def _frames():
+    """Blocky BGR frames swaying side to side, so every one passes the gate."""
+    import cv2
+
+    rng = np.random.default_rng(0)
+    blocks = rng.integers(0, 256, (HEIGHT // 40, WIDTH // 40, 3), dtype=np.uint8)
+    texture = cv2.resize(blocks, (WIDTH, HEIGHT), interpolation=cv2.INTER_NEAREST)
+    return [np.roll(texture, shift, axis=1) for shift in (0, 8, 16, 24, 32, 24, 16, 8)]
+
+
+def _measure(vision, frames):
+    """Return (current growth, peak above start) in bytes over FRAMES frames."""
+    for i in range(WARMUP_FRAMES):
+        vision.process_frame(frames[i % len(frames)], timestamp=i * 0.05)
+    gc.collect()
+    # CPython keeps up to 2000 freed 2-tuples for reuse and that free list
+    # fills by about one entry per frame; fill it now so it is not counted.
+    pairs = [(i, -i) for i in range(4000)]
+    del pairs
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for i in range(WARMUP_FRAMES, WARMUP_FRAMES + FRAMES):
+            vision.process_frame(frames[i % len(frames)], timestamp=i * 0.05)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return current - start, peak - start
+
+
+def test_detect_loop_memory_is_flat():
+    vision = VisionSystem(tracking=False, detection_width=DETECTION_WIDTH)
+    growth, peak = _measure(vision, _frames())
+    assert vision.cascade_runs >= FRAMES
+    assert growth < MAX_GROWTH
+    assert peak < MAX_PEAK
+
+
+def test_tracking_loop_memory_is_flat():
+    vision = VisionSystem(redetect_interval=10**9, detection_width=DETECTION_WIDTH)
+    frames = _frames()
+    gray = vision._to_gray(frames[0])
+    vision._tracker.reset(gray, [(100, 60, 120, 120)])
+    growth, peak = _measure(vision, frames)
+    assert vision.tracked_frames >= FRAMES
+    assert growth < MAX_GROWTH
+    assert peak < MAX_PEAK
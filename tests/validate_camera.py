@@ -3,6 +3,7 @@ import cv2
 import time
 import argparse
 from reachy_mini import ReachyMini
+from elf_on_shelf.frame_bus import FrameBus
 
 def main():
     parser = argparse.ArgumentParser(description="Validate Reachy Mini camera connectivity.")
@@ -24,21 +25,28 @@ def main():
         print("Camera is NOT initialized in SDK.")
         return
 
+    bus = FrameBus(reachy.media)
+    bus.start()
+    reader = bus.subscribe("validate_camera")
+
     print("Attempting to grab 5 frames...")
     frames_grabbed = 0
     for i in range(5):
-        frame = reachy.media.get_frame()
+        frame = reader.wait(timeout=2.0)
         if frame is not None:
-            print(f"Frame {i+1} received! Shape: {frame.shape}")
+            print(f"Frame {i+1} received! Shape: {frame.image.shape} (seq {frame.seq})")
             frames_grabbed += 1
             # Save the first frame to a file if possible
             if frames_grabbed == 1:
-                cv2.imwrite("camera_test.jpg", frame)
+                cv2.imwrite("camera_test.jpg", frame.image)
                 print("First frame saved as 'camera_test.jpg'")
         else:
             print(f"Frame {i+1} is None.")
         time.sleep(0.5)
 
+    bus.stop()
+    print(f"Frame bus stats: {bus.stats()}")
+
     if frames_grabbed > 0:
         print(f"SUCCESS: Grabbed {frames_grabbed}/5 frames.")
     else: